@@ -4,6 +4,7 @@ from flask_restplus import Api
 from app.api.admin import namespace as admin_namespace
 from app.api.v1 import namespace as api_v1_namespace
 from app.api.internal.v1 import namespace as internal_api_v1_namespace
+from app.api.well_known import namespace as well_known_namespace
 
 api = Api(
     title="Auth API",
@@ -14,6 +15,7 @@ api = Api(
 api.add_namespace(admin_namespace)
 api.add_namespace(api_v1_namespace)
 api.add_namespace(internal_api_v1_namespace)
+api.add_namespace(well_known_namespace)
 
 
 def init_api(app: Flask):
@@ -1,5 +1,9 @@
 from flask_restplus import Namespace
 
+from app.api.base import rate_limit
+from app.api.policies import admin_policy
+
 namespace = Namespace("Admin", path="/admin", description="Admin API operations")
+rate_limit(admin_policy)(namespace)
 
 from app.api.admin import roles, users
@@ -7,9 +7,12 @@ from app.api.admin import namespace
 from app.api.admin.parsers import role_list_parser, role_parser
 from app.api.admin.schemas import admin_role_schema
 from app.api.base import BaseJWTAdminResource
+from app.cache import response_cache
 from app.database import session_scope
 from app.datastore import user_datastore
 from app.models import Role
+from app.services.accounts import AccountsService, AccountsServiceError
+from app.services.identity import identity_cache
 
 
 @namespace.route("/roles")
@@ -70,6 +73,11 @@ class SpecificRolesView(BaseJWTAdminResource):
         except IntegrityError:
             raise exceptions.BadRequest("Already exists.")
 
+        # Role changes are rare, dropping the whole cache is cheaper
+        # than looking up every holder of the role.
+        identity_cache.clear()
+        response_cache.invalidate_all()
+
         return role
 
     @namespace.doc(
@@ -89,4 +97,27 @@ class SpecificRolesView(BaseJWTAdminResource):
         with session_scope() as session:
             session.delete(role)
 
+        identity_cache.clear()
+        response_cache.invalidate_all()
+
+        return "", http.HTTPStatus.NO_CONTENT
+
+
+@namespace.route("/roles/<uuid:role_id>/logout")
+class RoleLogoutView(BaseJWTAdminResource):
+    @namespace.doc(
+        "revoke tokens of every user holding the role",
+        responses={
+            http.HTTPStatus.NOT_FOUND: "Not Found",
+            http.HTTPStatus.NO_CONTENT: "No Content",
+        },
+    )
+    def post(self, role_id: int):
+        role = Role.query.get_or_404(role_id)
+
+        try:
+            AccountsService.logout_role(role)
+        except AccountsServiceError:
+            raise exceptions.FailedDependency()
+
         return "", http.HTTPStatus.NO_CONTENT
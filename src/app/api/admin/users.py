@@ -1,20 +1,21 @@
 import http
 
-from flask import jsonify
-
 from app.api.admin import namespace
 from app.api.base import BaseJWTAdminResource
+from app.cache import response_cache
 from app.database import session_scope
 from app.datastore import user_datastore
 from app.models import User, Role
+from app.services.identity import identity_cache
 
 
 @namespace.route("/users/<uuid:user_id>/has-role/<string:role_name>")
 class CheckUserRoleView(BaseJWTAdminResource):
     @namespace.doc("check if user has specific role")
+    @response_cache.cached(user_arg="user_id")
     def get(self, user_id: int, role_name: str):
         user = User.query.get_or_404(user_id)
-        return jsonify(has_role=user.has_role(role_name))
+        return {"has_role": user.has_role(role_name)}
 
 
 @namespace.route("/users/<uuid:user_id>/set-role/<uuid:role_id>")
@@ -31,3 +32,6 @@ class UserRoleView(BaseJWTAdminResource):
 
         with session_scope():
             user_datastore.add_role_to_user(user, role)
+
+        identity_cache.invalidate(user.id)
+        response_cache.invalidate(user.id)
@@ -1,10 +1,11 @@
 from functools import wraps
 
+from flask import request
 from flask_jwt_extended import jwt_required, verify_jwt_in_request, get_jwt
 from flask_restplus import Resource
 from werkzeug import exceptions
 
-from app.cache import cached
+from app.services.rate_limit import RateLimitPolicy
 from app.settings import settings
 
 
@@ -20,12 +21,45 @@ def admin_required(func):
     return wrapper
 
 
+def claims_only(func):
+    """
+    Build current_user from the verified token claims instead of
+    loading it from the database. The flag is kept on the request:
+    `g` may outlive it when an app context is already pushed.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        request.jwt_claims_only = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def rate_limit(*policies: RateLimitPolicy):
+    """
+    Replace the default rate limit of a resource class or of every
+    resource in a namespace: rate_limit(policy)(namespace).
+    """
+
+    def decorator(target):
+        target.rate_limit_policies = policies
+        return target
+
+    return decorator
+
+
 class BaseJWTResource(Resource):
     method_decorators = [] if settings.DEBUG else (jwt_required(),)
 
 
-class BaseJWTCachedResource(Resource):
-    method_decorators = [] if settings.DEBUG else (jwt_required(), cached)
+class BaseJWTClaimsResource(Resource):
+    """
+    Stateless resource for hot read endpoints: only the token signature
+    and revocation are checked, no SQLAlchemy session is touched.
+    """
+
+    method_decorators = [] if settings.DEBUG else (jwt_required(), claims_only)
 
 
 class BaseJWTAdminResource(Resource):
@@ -1,7 +1,11 @@
 from flask_restplus import Namespace
 
+from app.api.base import rate_limit
+from app.api.policies import internal_policy
+
 namespace = Namespace(
     "Internal api v1", path="/api/internal/v1", description="Internal API v1 operations"
 )
+rate_limit(internal_policy)(namespace)
 
-from app.api.internal.v1 import users
+from app.api.internal.v1 import users, tokens, metrics
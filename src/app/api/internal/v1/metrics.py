@@ -0,0 +1,12 @@
+from flask import jsonify
+
+from app.api.base import BaseJWTAdminResource
+from app.api.internal.v1 import namespace
+from app.metrics import metrics
+
+
+@namespace.route("/metrics")
+class MetricsView(BaseJWTAdminResource):
+    @namespace.doc("get worker metrics")
+    def get(self):
+        return jsonify(metrics.collect())
@@ -12,3 +12,23 @@ user_info_schema = namespace.model(
         "roles": fields.List(fields.String(), attribute="roles_names_list"),
     },
 )
+
+token_introspection_request_schema = namespace.model(
+    "TokenIntrospectionRequest",
+    {
+        "tokens": fields.List(
+            fields.String(), required=True, description="Encoded tokens"
+        ),
+    },
+)
+
+token_introspection_schema = namespace.model(
+    "TokenIntrospection",
+    {
+        "active": fields.Boolean(),
+        "sub": fields.String(),
+        "type": fields.String(),
+        "roles": fields.List(fields.String()),
+        "exp": fields.Integer(),
+    },
+)
@@ -0,0 +1,32 @@
+from werkzeug import exceptions
+
+from app.api.base import BaseJWTClaimsResource
+from app.api.internal.v1 import namespace
+from app.api.internal.v1.schemas import (
+    token_introspection_request_schema,
+    token_introspection_schema,
+)
+from app.services.introspection import (
+    IntrospectionService,
+    IntrospectionServiceError,
+)
+from app.settings import settings
+
+
+@namespace.route("/tokens/introspect")
+class TokensIntrospectionView(BaseJWTClaimsResource):
+    @namespace.doc("introspect a batch of tokens")
+    @namespace.expect(token_introspection_request_schema, validate=True)
+    @namespace.marshal_with(token_introspection_schema, as_list=True)
+    def post(self):
+        tokens = namespace.payload["tokens"]
+
+        if len(tokens) > settings.INTROSPECTION.MAX_TOKENS:
+            raise exceptions.BadRequest(
+                f"Up to {settings.INTROSPECTION.MAX_TOKENS} tokens are allowed."
+            )
+
+        try:
+            return IntrospectionService.introspect(tokens)
+        except IntrospectionServiceError:
+            raise exceptions.FailedDependency()
@@ -0,0 +1,106 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+import orjson
+from flask_sqlalchemy import BaseQuery
+from sqlalchemy import literal, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Cursor:
+    timestamp: datetime
+    id: UUID
+    backwards: bool = False
+
+    def encode(self) -> str:
+        data = orjson.dumps([self.timestamp, self.id, self.backwards])
+        return urlsafe_b64encode(data).decode()
+
+    @classmethod
+    def decode(cls, cursor: str) -> "Cursor":
+        try:
+            timestamp, id_, backwards = orjson.loads(urlsafe_b64decode(cursor))
+            return cls(datetime.fromisoformat(timestamp), UUID(id_), bool(backwards))
+        except (BinasciiError, orjson.JSONDecodeError, TypeError, ValueError) as err:
+            raise InvalidCursorError from err
+
+
+@dataclass(frozen=True)
+class Page:
+    items: list[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+class KeysetPaginator:
+    """
+    Newest first pagination on (timestamp, id) without OFFSET and COUNT.
+    A page is a range scan of an index on the same columns starting
+    right after the cursor, so it costs the same at any depth.
+    Next cursors point to older items, prev cursors to newer ones.
+    """
+
+    def __init__(
+        self,
+        timestamp: InstrumentedAttribute,
+        id_: InstrumentedAttribute,
+        per_page: int,
+    ) -> None:
+        self.timestamp = timestamp
+        self.id = id_
+        self.per_page = per_page
+
+    def paginate(self, query: BaseQuery, cursor: Optional[str] = None) -> Page:
+        position = Cursor.decode(cursor) if cursor else None
+        backwards = position is not None and position.backwards
+        key = tuple_(self.timestamp, self.id)
+
+        if position is not None:
+            bound = tuple_(
+                literal(position.timestamp, self.timestamp.type),
+                literal(position.id, self.id.type),
+            )
+            query = query.filter(key > bound if backwards else key < bound)
+
+        if backwards:
+            query = query.order_by(self.timestamp.asc(), self.id.asc())
+        else:
+            query = query.order_by(self.timestamp.desc(), self.id.desc())
+
+        # One extra row tells if there is anything past this page.
+        items = query.limit(self.per_page + 1).all()
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+
+        if backwards:
+            items.reverse()
+
+        if not items:
+            return Page(items=[], next_cursor=None, prev_cursor=None)
+
+        has_older = has_more if not backwards else True
+        has_newer = position is not None if not backwards else has_more
+
+        return Page(
+            items=items,
+            next_cursor=self._make_cursor(items[-1]) if has_older else None,
+            prev_cursor=(
+                self._make_cursor(items[0], backwards=True) if has_newer else None
+            ),
+        )
+
+    def _make_cursor(self, item: Any, backwards: bool = False) -> str:
+        return Cursor(
+            timestamp=getattr(item, self.timestamp.key),
+            id=getattr(item, self.id.key),
+            backwards=backwards,
+        ).encode()
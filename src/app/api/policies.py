@@ -0,0 +1,38 @@
+from dataclasses import replace
+
+from app.services.rate_limit import RateLimitPolicy, rate_limit_service
+from app.settings import settings
+
+# Every password check runs a slow hash, so it takes a bigger share
+# of the per-ip quota than a regular request.
+password_check_policy = replace(
+    rate_limit_service.default_policy, cost=settings.RATE_LIMIT.PASSWORD_CHECK_COST
+)
+
+# Guesses of one account are counted per ip as well: keyed by the login
+# alone, anyone could lock the account out for its owner.
+login_policies = (
+    password_check_policy,
+    RateLimitPolicy(
+        name="login",
+        limit=settings.RATE_LIMIT.LOGIN_MAX_CALLS,
+        period=settings.RATE_LIMIT.LOGIN_PERIOD,
+        key="login_ip",
+    ),
+)
+
+# Internal reads are cheap and come from a few services behind the same ips,
+# they are limited by the verified token subject rather than by ip.
+internal_policy = RateLimitPolicy(
+    name="internal",
+    limit=settings.RATE_LIMIT.INTERNAL_MAX_CALLS,
+    period=settings.RATE_LIMIT.PERIOD,
+    key="sub",
+)
+
+admin_policy = RateLimitPolicy(
+    name="admin",
+    limit=settings.RATE_LIMIT.MAX_CALLS,
+    period=settings.RATE_LIMIT.PERIOD,
+    key="sub",
+)
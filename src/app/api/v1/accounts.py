@@ -6,13 +6,15 @@ from flask_restplus import Resource
 from sqlalchemy.exc import IntegrityError
 from werkzeug import exceptions
 
-from app.api.base import BaseJWTResource
+from app.api.base import BaseJWTResource, rate_limit
+from app.api.policies import login_policies, password_check_policy
 from app.api.v1 import namespace
 from app.api.v1.parsers import signup_parser, login_parser
 from app.api.v1.schemas import signup_schema
 from app.database import session_scope
 from app.datastore import user_datastore
 from app.models import DefaultRoleEnum
+from app.passwords import PasswordHasherBusyError
 from app.services.accounts import (
     AccountsService,
     AccountsServiceError,
@@ -22,6 +24,7 @@ from app.services.storages import TokenStorageError
 
 
 @namespace.route("/signup")
+@rate_limit(password_check_policy)
 class SignUpView(Resource):
     @namespace.doc("signup")
     @namespace.expect(signup_parser)
@@ -33,11 +36,14 @@ class SignUpView(Resource):
                 user_datastore.add_role_to_user(new_user, DefaultRoleEnum.guest.value)
         except IntegrityError:
             raise exceptions.BadRequest("Already exists.")
+        except PasswordHasherBusyError:
+            raise exceptions.ServiceUnavailable()
 
         return new_user, http.HTTPStatus.CREATED
 
 
 @namespace.route("/login")
+@rate_limit(*login_policies)
 class LoginView(Resource):
     @namespace.doc("login")
     @namespace.expect(login_parser)
@@ -51,6 +57,8 @@ class LoginView(Resource):
             )
         except AccountsServiceError:
             raise exceptions.Unauthorized()
+        except PasswordHasherBusyError:
+            raise exceptions.ServiceUnavailable()
 
         account_service = AccountsService(user)
 
@@ -66,10 +74,18 @@ class LoginView(Resource):
 class LogoutView(BaseJWTResource):
     @namespace.doc("logout")
     def post(self):
-        jti = get_jwt()["jti"]
+        try:
+            AccountsService.logout(get_jwt())
+        except AccountsServiceError:
+            raise exceptions.FailedDependency()
+
 
+@namespace.route("/logout/all")
+class LogoutAllView(BaseJWTResource):
+    @namespace.doc("logout from all devices")
+    def post(self):
         try:
-            AccountsService.logout(jti, current_user.id)
+            AccountsService.logout_everywhere(current_user.id)
         except AccountsServiceError:
             raise exceptions.FailedDependency()
 
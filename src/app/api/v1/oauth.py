@@ -4,6 +4,7 @@ from werkzeug import exceptions
 
 from app.api.v1 import namespace
 from app.oauth import oauth
+from app.passwords import PasswordHasherBusyError
 from app.services.oauth import OauthServiceError, OauthService
 
 
@@ -49,5 +50,7 @@ class OauthAuthorizationView(Resource):
             access_token, refresh_token = oauth_service.login(request)
         except OauthServiceError:
             raise exceptions.Unauthorized()
+        except PasswordHasherBusyError:
+            raise exceptions.ServiceUnavailable()
 
         return jsonify(access_token=access_token, refresh_token=refresh_token)
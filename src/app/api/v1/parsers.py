@@ -1,3 +1,5 @@
+from flask_restplus import inputs
+
 from app.api.v1 import namespace
 from app.settings import settings
 
@@ -30,7 +32,12 @@ user_password_parser.add_argument(
 )
 
 user_history_parser = namespace.parser()
-user_history_parser.add_argument("page", type=int, default=0, help="page")
 user_history_parser.add_argument(
-    "per_page", type=int, default=settings.PAGINATION.PAGE_LIMIT, help="Items per page"
+    "cursor", type=str, help="next_cursor or prev_cursor of the previous page"
+)
+user_history_parser.add_argument(
+    "per_page",
+    type=inputs.positive,
+    default=settings.PAGINATION.PAGE_LIMIT,
+    help=f"Items per page, at most {settings.PAGINATION.MAX_PAGE_LIMIT}",
 )
@@ -30,3 +30,12 @@ user_history_schema = namespace.model(
         "device": fields.String(),
     },
 )
+
+user_history_page_schema = namespace.model(
+    "UserHistoryPage",
+    {
+        "items": fields.List(fields.Nested(user_history_schema)),
+        "next_cursor": fields.String(),
+        "prev_cursor": fields.String(),
+    },
+)
@@ -1,47 +1,59 @@
-from flask_jwt_extended import get_jwt, current_user
+from flask_jwt_extended import current_user
 from werkzeug import exceptions
 
-from app.api.base import BaseJWTResource
+from app.api.base import BaseJWTResource, rate_limit
+from app.api.pagination import InvalidCursorError, KeysetPaginator
+from app.api.policies import password_check_policy
 from app.api.v1 import namespace
 from app.api.v1.parsers import user_password_parser, user_history_parser
-from app.api.v1.schemas import user_history_schema
+from app.api.v1.schemas import user_history_page_schema
+from app.cache import response_cache
 from app.database import session_scope
-from app.models import AuthHistory
+from app.models import AuthHistory, User
+from app.passwords import PasswordHasherBusyError
 from app.services.accounts import AccountsService, AccountsServiceError
+from app.settings import settings
 
 
 @namespace.route("/users/update-password")
+@rate_limit(password_check_policy)
 class UsersView(BaseJWTResource):
     @namespace.doc("update user password")
     @namespace.expect(user_password_parser)
     def patch(self):
         args = user_password_parser.parse_args()
-
-        if not current_user.check_password(args["old_password"]):
-            raise exceptions.BadRequest()
-
-        jti = get_jwt()["jti"]
+        user = User.query.get_or_404(current_user.id)
 
         try:
+            if not user.check_password(args["old_password"]):
+                raise exceptions.BadRequest()
+
             with session_scope():
-                current_user.password = args["new_password"]
-                AccountsService.logout(jti, current_user.id)
+                user.password = args["new_password"]
+                AccountsService.logout_everywhere(user.id)
         except AccountsServiceError:
             raise exceptions.FailedDependency()
+        except PasswordHasherBusyError:
+            raise exceptions.ServiceUnavailable()
 
 
 @namespace.route("/users/history")
 class UserHistoryView(BaseJWTResource):
     @namespace.doc("get list of user history")
     @namespace.expect(user_history_parser)
-    @namespace.marshal_with(user_history_schema, as_list=True)
+    @response_cache.cached()
+    @namespace.marshal_with(user_history_page_schema)
     def get(self):
         args = user_history_parser.parse_args()
-        queryset = AuthHistory.query.filter_by(user_id=current_user.id).order_by(
-            AuthHistory.timestamp.asc()
-        )
-        paginator = queryset.paginate(
-            page=args["page"], per_page=args["per_page"], error_out=False
+        paginator = KeysetPaginator(
+            AuthHistory.timestamp,
+            AuthHistory.id,
+            per_page=min(args["per_page"], settings.PAGINATION.MAX_PAGE_LIMIT),
         )
 
-        return paginator.items
+        try:
+            return paginator.paginate(
+                AuthHistory.query.filter_by(user_id=current_user.id), args["cursor"]
+            )
+        except InvalidCursorError:
+            raise exceptions.BadRequest("Invalid cursor.")
@@ -0,0 +1,7 @@
+from flask_restplus import Namespace
+
+namespace = Namespace(
+    "Well known", path="/.well-known", description="Public discovery documents"
+)
+
+from app.api.well_known import jwks
@@ -0,0 +1,18 @@
+from flask import jsonify, request
+from flask_restplus import Resource
+
+from app.api.well_known import namespace
+from app.keys import key_ring
+from app.settings import settings
+
+
+@namespace.route("/jwks.json")
+class JWKSView(Resource):
+    @namespace.doc("get public keys for offline token verification")
+    def get(self):
+        response = jsonify(key_ring.jwks)
+        response.set_etag(key_ring.jwks_etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = settings.JWT.JWKS_MAX_AGE
+
+        return response.make_conditional(request)
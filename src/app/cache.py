@@ -1,31 +1,530 @@
+import logging
+from collections import OrderedDict
 from functools import wraps
+from hashlib import sha1
+from math import ceil, log
+from random import random
+from time import monotonic, time
+from typing import Any, Callable, Hashable, Optional, Union
+from urllib.parse import urlencode
+from uuid import UUID, uuid4
 
-from flask import Flask
+import gevent
+from gevent.event import AsyncResult
+from flask import Flask, request
 from flask_caching import Cache
-from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_caching.backends.rediscache import RedisCache
+from flask_jwt_extended import get_jwt
 
+from app.metrics import metrics
+from app.serializers import Serializer, SerializerError, get_serializer
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
 cache = Cache()
 
+_MISSING = object()
+# Stored in L1 for keys missing from L2, e.g. the response cache versions,
+# which exist only after their first bump.
+_NONE = object()
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with an optional per-entry TTL.
+    Lives in a single worker, so it is only suitable for data
+    that tolerates staleness bounded by the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[Optional[float], Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        expires_at, value = self._data.get(key, (None, _MISSING))
+
+        if value is _MISSING or (expires_at is not None and expires_at <= monotonic()):
+            self._data.pop(key, None)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class SerializedRedisCache(RedisCache):
+    """
+    Redis cache backend storing values with a pluggable serializer
+    instead of pickle. Integers are kept as plain strings, so inc and
+    dec still work. Values of an unknown format, e.g. pickles written
+    by the stock backend or values written with another serializer,
+    are treated as misses.
+    """
+
+    MARKER = b"~"
+
+    def __init__(self, *args, serializer: Optional[Serializer] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # not `serializer`, newer cachelib backends use that name themselves
+        self.value_serializer = serializer or get_serializer("json")
+
+    @classmethod
+    def factory(cls, app: Flask, config: dict, args: list, kwargs: dict):
+        kwargs.update(
+            serializer=get_serializer(
+                config["CACHE_SERIALIZER"], config["CACHE_COMPRESS_THRESHOLD"]
+            )
+        )
+        return super().factory(app, config, args, kwargs)
+
+    def dump_object(self, value: Any) -> bytes:
+        if type(value) is int:
+            return str(value).encode()
+
+        return self.MARKER + self.value_serializer.dumps(value)
+
+    def load_object(self, value: Optional[bytes]) -> Any:
+        if value is None:
+            return None
+
+        if value.startswith(self.MARKER):
+            try:
+                return self.value_serializer.loads(value[len(self.MARKER) :])
+            except SerializerError:
+                # e.g. written before a serializer or compression change
+                return None
 
-def cached(func):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+
+
+class TwoTierCache(SerializedRedisCache):
     """
-    Custom decorator for caching the result based on the jwt sub,
-    which in the current project is the user ID.
+    Serialized Redis cache backend (L2) with a per-worker LocalCache (L1)
+    in front.
+
+    Missing keys are cached in L1 too. Every write publishes the changed
+    keys, so the other workers drop them from their L1. L1 is bypassed while the subscription is down
+    and is cleared on resubscribing, because invalidations could have
+    been missed. The short L1 TTL bounds staleness if a message is lost.
+    Values in L1 are shared between requests and must not be mutated.
     """
 
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        return cache.cached(key_prefix=get_jwt()["sub"])(func)(*args, **kwargs)
+    def __init__(
+        self,
+        *args,
+        l1_max_size: int = 1000,
+        l1_ttl: float = 5,
+        channel: str = "cache",
+        retry_interval: float = 1.0,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.l1 = LocalCache(max_size=l1_max_size, ttl=l1_ttl)
+        self.channel = channel
+        self.retry_interval = retry_interval
+
+        self._worker_id = uuid4().hex
+        self._subscribed = False
+        self._listener: Optional[gevent.Greenlet] = None
+
+    @classmethod
+    def factory(cls, app: Flask, config: dict, args: list, kwargs: dict):
+        kwargs.update(
+            l1_max_size=config["CACHE_L1_MAX_SIZE"],
+            l1_ttl=config["CACHE_L1_TTL"],
+            channel=config["CACHE_INVALIDATION_CHANNEL"],
+        )
+        return super().factory(app, config, args, kwargs)
+
+    def start(self) -> None:
+        if self._listener is None or self._listener.dead:
+            self._listener = gevent.spawn(self._listen)
+
+    def get(self, key: str) -> Any:
+        self.start()
+
+        if self._subscribed:
+            value = self.l1.get(key, _MISSING)
+
+            if value is not _MISSING:
+                return None if value is _NONE else value
+
+        value = super().get(key)
+
+        if self._subscribed:
+            self.l1.set(key, _NONE if value is None else value)
+
+        return value
+
+    def get_many(self, *keys: str) -> list:
+        self.start()
+
+        if not self._subscribed:
+            return super().get_many(*keys)
+
+        values = {key: self.l1.get(key, _MISSING) for key in keys}
+        missing = [key for key, value in values.items() if value is _MISSING]
+
+        if missing:
+            for key, value in zip(missing, super().get_many(*missing)):
+                values[key] = value
+                self.l1.set(key, _NONE if value is None else value)
+
+        return [None if values[key] is _NONE else values[key] for key in keys]
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> Any:
+        result = super().set(key, value, timeout=timeout)
+        self._publish(key)
+        return result
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> Any:
+        result = super().add(key, value, timeout=timeout)
+        self._publish(key)
+        return result
+
+    def set_many(self, mapping: dict, timeout: Optional[int] = None) -> Any:
+        result = super().set_many(mapping, timeout=timeout)
+        self._publish(*mapping)
+        return result
+
+    def delete(self, key: str) -> Any:
+        result = super().delete(key)
+        self._publish(key)
+        return result
+
+    def delete_many(self, *keys: str) -> Any:
+        result = super().delete_many(*keys)
+        self._publish(*keys)
+        return result
+
+    def inc(self, key: str, delta: int = 1) -> Any:
+        result = super().inc(key, delta=delta)
+        self._publish(key)
+        return result
+
+    def dec(self, key: str, delta: int = 1) -> Any:
+        result = super().dec(key, delta=delta)
+        self._publish(key)
+        return result
+
+    def clear(self) -> Any:
+        result = super().clear()
+        self._publish("*")
+        return result
+
+    def _publish(self, *keys: str) -> None:
+        """The written value isn't put to L1, it is read back once from L2."""
+
+        self.l1.delete(*keys)
+        self._write_client.publish(self.channel, "\n".join((self._worker_id, *keys)))
 
-    return wrapper
+    def _invalidate(self, message: bytes) -> None:
+        worker_id, *keys = message.decode().split("\n")
+
+        if worker_id == self._worker_id:
+            return
+
+        if "*" in keys:
+            self.l1.clear()
+        else:
+            self.l1.delete(*keys)
+
+    def _listen(self) -> None:
+        while True:
+            pubsub = self._write_client.pubsub(ignore_subscribe_messages=True)
+
+            try:
+                pubsub.subscribe(self.channel)
+                self.l1.clear()
+                self._subscribed = True
+
+                for message in pubsub.listen():
+                    self._invalidate(message["data"])
+            except Exception:
+                logger.exception("Cache invalidation channel subscription failed.")
+                self._subscribed = False
+                pubsub.close()
+                gevent.sleep(self.retry_interval)
+
+
+class ResponseCache:
+    """
+    Caches view results by endpoint, user and normalized arguments.
+    The keys include a version counter of the user and a global one, so
+    all the responses cached for a user, or for everyone, are dropped
+    with a single INCR. Cache failures are logged, not raised.
+
+    Stampede protection:
+    - concurrent misses of a key in a worker wait for a single computation;
+    - across workers, only the holder of the key lock computes it, the
+      others serve the stale value or wait for the new one;
+    - entries are refreshed before they expire with a probability that
+      grows with the time left and the computation time (XFetch), so hot
+      keys rarely expire at all.
+    """
+
+    GLOBAL_VERSION = "global"
+
+    def __init__(
+        self,
+        cache: Cache,
+        lock_timeout: float,
+        poll_interval: float,
+        xfetch_beta: float,
+    ) -> None:
+        self.cache = cache
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.xfetch_beta = xfetch_beta
+
+        self.counters = dict.fromkeys(
+            (
+                "hits",
+                "misses",
+                "early_refreshes",
+                "coalesced",
+                "stale_served",
+                "lock_waits",
+                "lock_timeouts",
+            ),
+            0,
+        )
+        self._computations: dict[str, AsyncResult] = {}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return dict(self.counters, computing=len(self._computations))
+
+    def cached(self, timeout: Optional[int] = None, user_arg: Optional[str] = None):
+        """
+        The user is the jwt sub, or the view argument `user_arg` for
+        views about another user. Goes under jwt_required.
+        """
+
+        timeout = timeout or settings.CACHE.TTL
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                user_id = str(kwargs[user_arg]) if user_arg else get_jwt()["sub"]
+
+                try:
+                    key = self._make_key(user_id, kwargs)
+                    entry = self.cache.get(key)
+                except Exception:
+                    logger.exception("Failed to get cached response.")
+                    return func(*args, **kwargs)
+
+                if entry is None:
+                    self.counters["misses"] += 1
+                elif self._should_refresh(entry):
+                    self.counters["early_refreshes"] += 1
+                else:
+                    self.counters["hits"] += 1
+                    return entry["value"]
+
+                return self._compute(key, entry, timeout, lambda: func(*args, **kwargs))
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *user_ids: Union[str, UUID]) -> None:
+        for user_id in user_ids:
+            self._bump_version(str(user_id))
+
+    def invalidate_all(self) -> None:
+        self._bump_version(self.GLOBAL_VERSION)
+
+    def _bump_version(self, user_id: str) -> None:
+        try:
+            # Flask-Caching doesn't proxy inc, the backend does it atomically.
+            self.cache.cache.inc(self._version_key(user_id))
+        except Exception:
+            logger.exception("Failed to invalidate cached responses.")
+
+    def _make_key(self, user_id: str, view_args: dict) -> str:
+        user_version, global_version = self.cache.get_many(
+            self._version_key(user_id), self._version_key(self.GLOBAL_VERSION)
+        )
+        args = sorted(request.args.items(multi=True))
+        args += sorted((name, str(value)) for name, value in view_args.items())
+        args_hash = sha1(urlencode(args).encode()).hexdigest()[:16]
+
+        return (
+            f"view:{request.endpoint}:{user_id}:"
+            f"{user_version or 0}.{global_version or 0}:{args_hash}"
+        )
+
+    @staticmethod
+    def _version_key(user_id: str) -> str:
+        return f"view_version:{user_id}"
+
+    def _should_refresh(self, entry: dict) -> bool:
+        # log of (0, 1] is <= 0, so the check moves the "now" forward
+        # by a random multiple of the computation time.
+        gap = -entry["delta"] * self.xfetch_beta * log(1 - random())
+        return time() + gap >= entry["expires_at"]
+
+    def _compute(
+        self, key: str, stale: Optional[dict], timeout: int, compute: Callable
+    ) -> Any:
+        """Greenlets of the worker missing the same key share one computation."""
+
+        computation = self._computations.get(key)
+
+        if computation is not None:
+            self.counters["coalesced"] += 1
+            return computation.get()
+
+        computation = self._computations[key] = AsyncResult()
+
+        try:
+            value = self._compute_locked(key, stale, timeout, compute)
+        except Exception as err:
+            computation.set_exception(err)
+            raise
+        else:
+            computation.set(value)
+            return value
+        finally:
+            del self._computations[key]
+
+    def _compute_locked(
+        self, key: str, stale: Optional[dict], timeout: int, compute: Callable
+    ) -> Any:
+        lock_key = f"{key}:lock"
+
+        try:
+            is_locked = self.cache.add(lock_key, 1, timeout=ceil(self.lock_timeout))
+        except Exception:
+            logger.exception("Failed to lock cached response.")
+            is_locked = False
+        else:
+            if not is_locked:
+                if stale is not None:
+                    self.counters["stale_served"] += 1
+                    return stale["value"]
+
+                entry = self._wait(key, lock_key)
+
+                if entry is not None:
+                    return entry["value"]
+
+        try:
+            started = monotonic()
+            value = compute()
+            entry = {
+                "value": value,
+                "delta": monotonic() - started,
+                "expires_at": time() + timeout,
+            }
+
+            try:
+                self.cache.set(key, entry, timeout=timeout)
+            except Exception:
+                logger.exception("Failed to cache response.")
+        finally:
+            # A failed computation releases the lock too, so the other
+            # workers don't wait for it until the lock timeout.
+            if is_locked:
+                try:
+                    self.cache.delete(lock_key)
+                except Exception:
+                    logger.exception("Failed to unlock cached response.")
+
+        return value
+
+    def _wait(self, key: str, lock_key: str) -> Optional[dict]:
+        """
+        Waits for another worker to compute the key, while it holds the lock.
+        None if it doesn't come, or can't be read, and has to be computed here.
+        """
+
+        self.counters["lock_waits"] += 1
+        deadline = monotonic() + self.lock_timeout
+
+        while monotonic() < deadline:
+            gevent.sleep(self.poll_interval)
+
+            try:
+                entry, lock = self.cache.get_many(key, lock_key)
+            except Exception:
+                logger.exception("Failed to wait for cached response.")
+                return None
+
+            if entry is not None:
+                return entry
+
+            if lock is None:
+                return None
+
+        self.counters["lock_timeouts"] += 1
+
+        return None
+
+
+response_cache = ResponseCache(
+    cache,
+    lock_timeout=settings.CACHE.LOCK_TIMEOUT,
+    poll_interval=settings.CACHE.LOCK_POLL_INTERVAL,
+    xfetch_beta=settings.CACHE.XFETCH_BETA,
+)
+
+metrics.register("response_cache", lambda: response_cache.stats)
 
 
 def init_cache(app: Flask):
-    app.config["CACHE_TYPE"] = "RedisCache"
+    app.config["CACHE_TYPE"] = (
+        "app.cache.TwoTierCache"
+        if settings.CACHE.TWO_TIER
+        else "app.cache.SerializedRedisCache"
+    )
     app.config["CACHE_REDIS_URL"] = settings.REDIS.DSN
     app.config["CACHE_DEFAULT_TIMEOUT"] = settings.CACHE.TTL
+    app.config["CACHE_L1_MAX_SIZE"] = settings.CACHE.L1_MAX_SIZE
+    app.config["CACHE_L1_TTL"] = settings.CACHE.L1_TTL
+    app.config["CACHE_INVALIDATION_CHANNEL"] = settings.CACHE.INVALIDATION_CHANNEL
+    app.config["CACHE_SERIALIZER"] = settings.CACHE.SERIALIZER
+    app.config["CACHE_COMPRESS_THRESHOLD"] = settings.CACHE.COMPRESS_THRESHOLD
 
     cache.init_app(app)
+    backend = app.extensions["cache"][cache]
+
+    if isinstance(backend, TwoTierCache):
+        metrics.register("cache_l1", lambda: backend.l1.stats)
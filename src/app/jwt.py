@@ -1,12 +1,16 @@
 from datetime import timedelta
 
-from flask import Flask
+from flask import Flask, request
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.config import config
+from jwt.exceptions import InvalidSignatureError
 from werkzeug import exceptions
 
 from app.api import api
-from app.models import User
-from app.services.storages import token_storage, TokenStorageError
+from app.keys import key_ring
+from app.services.identity import identity_cache, UserSnapshot
+from app.services.revocation import RevocationService
+from app.services.storages import TokenStorageError
 from app.settings import settings
 
 jwt = JWTManager()
@@ -20,20 +24,56 @@ def user_identity_lookup(user):
 
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
-    identity = jwt_data["sub"]
-    return User.query.filter_by(id=identity).one_or_none()
+    if getattr(request, "jwt_claims_only", False):
+        return UserSnapshot.from_claims(jwt_data)
+
+    return identity_cache.get_user(jwt_data["sub"])
+
+
+@jwt.additional_headers_loader
+def add_key_id_header(identity):
+    if not key_ring:
+        return {}
+
+    return {"kid": key_ring.signing_key.kid}
+
+
+@jwt.encode_key_loader
+def encode_key_callback(identity):
+    if not key_ring:
+        return config.encode_key
+
+    return key_ring.signing_key.private_key
+
+
+@jwt.decode_key_loader
+def decode_key_callback(jwt_header, jwt_payload):
+    if not key_ring:
+        return config.decode_key
+
+    key = key_ring.get(jwt_header.get("kid"))
+
+    if not key:
+        raise InvalidSignatureError("Unknown key id.")
+
+    return key.public_key
 
 
 @jwt.token_in_blocklist_loader
 def check_if_token_is_revoked(jwt_header, jwt_payload):
     try:
-        return token_storage.validate_access_token(jwt_payload["jti"])
+        return RevocationService.is_token_revoked(jwt_payload)
     except TokenStorageError:
         raise exceptions.FailedDependency()
 
 
 def init_jwt(app: Flask):
-    app.config["JWT_SECRET_KEY"] = settings.JWT.SECRET_KEY
+    if key_ring:
+        app.config["JWT_ALGORITHM"] = key_ring.signing_key.algorithm
+        app.config["JWT_DECODE_ALGORITHMS"] = key_ring.algorithms
+    else:
+        app.config["JWT_SECRET_KEY"] = settings.JWT.SECRET_KEY
+
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(
         seconds=settings.JWT.ACCESS_TOKEN_EXPIRES
     )
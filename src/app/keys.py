@@ -0,0 +1,107 @@
+import json
+from base64 import urlsafe_b64encode
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional, Union
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    PublicFormat,
+    load_pem_private_key,
+)
+
+from app.settings import settings
+
+PrivateKey = Union[RSAPrivateKey, Ed25519PrivateKey]
+
+
+def _b64(data: bytes) -> str:
+    return urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64_int(value: int) -> str:
+    return _b64(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+class SigningKey:
+    def __init__(self, kid: str, private_key: PrivateKey) -> None:
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+
+        if isinstance(private_key, RSAPrivateKey):
+            self.algorithm = "RS256"
+        elif isinstance(private_key, Ed25519PrivateKey):
+            self.algorithm = "EdDSA"
+        else:
+            raise ValueError(f"Unsupported key type for kid {kid}.")
+
+    @property
+    def jwk(self) -> dict[str, str]:
+        jwk = {"kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+        if self.algorithm == "RS256":
+            numbers = self.public_key.public_numbers()
+            jwk.update(kty="RSA", n=_b64_int(numbers.n), e=_b64_int(numbers.e))
+        else:
+            raw = self.public_key.public_bytes(Encoding.Raw, PublicFormat.Raw)
+            jwk.update(kty="OKP", crv="Ed25519", x=_b64(raw))
+
+        return jwk
+
+
+class KeyRing:
+    """
+    Asymmetric keys for signing and verifying tokens, loaded from
+    `<kid>.pem` private keys. Every key is published in the JWKS, only
+    the one with the signing kid is used for new tokens.
+
+    Rotation: add the new key, wait for the JWKS max-age to pass,
+    switch the signing kid, and remove the old key once tokens
+    signed with it have expired.
+    """
+
+    def __init__(self, keys: list[SigningKey], signing_kid: str = "") -> None:
+        self.keys = {key.kid: key for key in keys}
+
+        if not signing_kid and len(self.keys) == 1:
+            signing_kid = keys[0].kid
+
+        if self.keys and signing_kid not in self.keys:
+            raise ValueError(f"Signing key {signing_kid!r} not found.")
+
+        self.signing_key: Optional[SigningKey] = self.keys.get(signing_kid)
+        self.jwks = {"keys": [key.jwk for key in self.keys.values()]}
+        self.jwks_etag = sha256(
+            json.dumps(self.jwks, sort_keys=True).encode()
+        ).hexdigest()
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
+
+    @classmethod
+    def from_dir(cls, path: str, signing_kid: str = "") -> "KeyRing":
+        if not path:
+            return cls([])
+
+        keys = [
+            SigningKey(
+                kid=key_path.stem,
+                private_key=load_pem_private_key(key_path.read_bytes(), None),
+            )
+            for key_path in sorted(Path(path).glob("*.pem"))
+        ]
+
+        return cls(keys, signing_kid)
+
+    @property
+    def algorithms(self) -> list[str]:
+        return sorted({key.algorithm for key in self.keys.values()})
+
+    def get(self, kid: Optional[str]) -> Optional[SigningKey]:
+        return self.keys.get(kid)
+
+
+key_ring = KeyRing.from_dir(settings.JWT.KEYS_DIR, settings.JWT.SIGNING_KEY_ID)
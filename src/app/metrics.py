@@ -0,0 +1,20 @@
+from typing import Callable
+
+
+class MetricsRegistry:
+    """
+    Collects in-process counters of the worker. Components register
+    a provider returning a dict of their current values.
+    """
+
+    def __init__(self) -> None:
+        self._providers: dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, provider: Callable[[], dict]) -> None:
+        self._providers[name] = provider
+
+    def collect(self) -> dict[str, dict]:
+        return {name: provider() for name, provider in self._providers.items()}
+
+
+metrics = MetricsRegistry()
@@ -1,29 +1,146 @@
-from datetime import datetime
+from ipaddress import ip_address
+from typing import Optional
+from uuid import UUID
 
-from flask import Flask, request
-from redis.client import Pipeline
+from flask import Flask, Response, current_app, request
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
 from werkzeug import exceptions
 
-from app.redis import redis_conn
+from app.api import api
+from app.services.rate_limit import (
+    rate_limit_service,
+    RateLimitError,
+    RateLimitPolicy,
+)
 from app.settings import settings
+from app.timing import get_server_timing_header
+
+_view_policies: dict[Optional[str], Optional[tuple[RateLimitPolicy, ...]]] = {}
+
+
+def get_view_policies() -> tuple[RateLimitPolicy, ...]:
+    """Policies of the resource, else of its namespace, else the default one."""
+
+    if request.endpoint not in _view_policies:
+        view = current_app.view_functions.get(request.endpoint)
+        view_class = getattr(view, "view_class", None)
+        policies = getattr(view_class, "rate_limit_policies", None)
+
+        if policies is None:
+            for namespace in api.namespaces:
+                if any(resource[0] is view_class for resource in namespace.resources):
+                    policies = getattr(namespace, "rate_limit_policies", None)
+                    break
+
+        _view_policies[request.endpoint] = policies
+
+    return _view_policies[request.endpoint] or (rate_limit_service.default_policy,)
+
+
+def get_ip_identity() -> bytes:
+    """4 or 16 bytes of packed address."""
+
+    try:
+        return ip_address(request.remote_addr).packed
+    except ValueError:
+        return request.remote_addr.encode()
+
+
+def get_sub_identity() -> Optional[bytes]:
+    """
+    Signature is verified, but not revocation: that is up to the view,
+    a revoked token only spends its own quota.
+    """
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+
+    if scheme != "Bearer" or not token:
+        return None
+
+    try:
+        return UUID(decode_token(token)["sub"]).bytes
+    except (JWTExtendedException, PyJWTError, KeyError, ValueError):
+        return None
+
+
+def get_login_ip_identity() -> Optional[bytes]:
+    """
+    Submitted login from the client ip, so guessing a password from many
+    ips is still limited per ip, but can't lock the account out for others.
+    """
+
+    login = request.form.get("login")
+    return get_ip_identity() + login.lower().encode() if login else None
+
+
+IDENTITY_GETTERS = {
+    "ip": get_ip_identity,
+    "sub": get_sub_identity,
+    "login_ip": get_login_ip_identity,
+}
 
 
 def rate_limit_middleware():
-    dt = datetime.now().replace(second=0, microsecond=0)
-    key = f"{request.remote_addr}:{dt}"
-    increment_step = 1
+    results = []
+
+    for policy in get_view_policies():
+        identity = IDENTITY_GETTERS[policy.key]()
+
+        # Clients without the policy identity get the default limit by ip,
+        # the keyed policy limits are for the verified identities only.
+        if identity is None:
+            policy = rate_limit_service.default_policy
+            identity = get_ip_identity()
 
-    def callback(pipe: Pipeline) -> None:
-        pipe.incr(key, increment_step)
-        pipe.expire(key, settings.RATE_LIMIT.PERIOD)
+        try:
+            result = rate_limit_service.hit(policy, identity)
+        except RateLimitError:
+            raise exceptions.ServiceUnavailable()
 
-    request_number, _ = redis_conn.transaction(func=callback)
+        results.append(result)
 
-    if request_number > settings.RATE_LIMIT.MAX_CALLS:
+        if not result.allowed:
+            break
+
+    # The most restrictive policy is reported. Kept on the request,
+    # `g` outlives it when an app context has been pushed beforehand.
+    request.rate_limit = min(
+        results, key=lambda result: (result.allowed, result.remaining)
+    )
+
+    if not request.rate_limit.allowed:
         raise exceptions.TooManyRequests()
 
 
+def rate_limit_headers_middleware(response: Response) -> Response:
+    result = getattr(request, "rate_limit", None)
+
+    if result is not None:
+        response.headers.extend(result.headers)
+
+    return response
+
+
+def server_timing_middleware(response: Response) -> Response:
+    if not settings.SERVER_TIMING:
+        return response
+
+    header = get_server_timing_header()
+
+    if header:
+        response.headers["Server-Timing"] = header
+
+    return response
+
+
 def init_middlewares(app: Flask):
     @app.before_request
     def apply_middlewares():
         rate_limit_middleware()
+
+    @app.after_request
+    def apply_response_middlewares(response: Response) -> Response:
+        response = rate_limit_headers_middleware(response)
+        return server_timing_middleware(response)
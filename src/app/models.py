@@ -4,9 +4,9 @@ from uuid import uuid4
 
 from flask_security import UserMixin, RoleMixin
 from sqlalchemy.dialects.postgresql import UUID, ENUM
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.database import db, session_scope
+from app.passwords import password_hasher
 
 
 class DefaultRoleEnum(str, Enum):
@@ -120,10 +120,10 @@ class User(TimestampMixin, db.Model, UserMixin, MethodsExtensionMixin):
 
     @password.setter
     def password(self, password: str) -> None:
-        self._password = generate_password_hash(password)
+        self._password = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self._password, password)
+        return password_hasher.check(self._password, password)
 
     @property
     def is_admin(self) -> bool:
@@ -138,15 +138,17 @@ class User(TimestampMixin, db.Model, UserMixin, MethodsExtensionMixin):
 
 class AuthHistory(TimestampMixin, db.Model):
     """
-    Partitioned by src/migrations/versions/custom1_auth_history_partitioning.py
+    Partitioned by month of timestamp by
+    src/migrations/versions/custom3_auth_history_time_partitioning.py,
+    partitions are maintained by `python manage.py partitions`.
     """
 
     __tablename__ = "auth_history"
-    __table_args__ = (db.PrimaryKeyConstraint("id", "platform"),)
+    __table_args__ = (db.PrimaryKeyConstraint("id", "timestamp"),)
 
     id = db.Column(UUID(as_uuid=True), default=uuid4, nullable=False)
     user_id = db.Column("user_id", UUID(as_uuid=True), db.ForeignKey("users.id"))
-    timestamp = db.Column(db.DateTime, server_default=db.func.now())
+    timestamp = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     user_agent = db.Column(db.Text, nullable=False)
     ip_addr = db.Column(db.String(100))
     device = db.Column(db.Text)
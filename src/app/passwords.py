@@ -0,0 +1,139 @@
+from functools import cached_property
+from time import perf_counter
+from typing import Callable, Optional, TypeVar
+
+from gevent.threadpool import ThreadPool
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.metrics import metrics
+from app.settings import settings
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusyError(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs PBKDF2 in native threads, so a password check blocks only the
+    greenlet waiting for it instead of the whole worker. hashlib releases
+    the GIL while hashing, so other greenlets keep being served.
+
+    At most `max_workers` hashes run at once, others wait in the pool
+    queue. Once `max_queue` calls are waiting, new ones are rejected
+    instead of piling up. With no workers hashes run inline.
+
+    New hashes are made with `method` and `salt_length`, hashes made
+    with other parameters are reported by `needs_rehash`.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        method: str = "pbkdf2:sha256:260000",
+        salt_length: int = 16,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.method = method
+        self.salt_length = salt_length
+        self.in_flight = 0
+        self.rejected = 0
+        self._pool: Optional[ThreadPool] = None
+
+    @property
+    def pool(self) -> ThreadPool:
+        # Created on first use, after gevent has patched the process.
+        if self._pool is None:
+            self._pool = ThreadPool(self.max_workers)
+
+        return self._pool
+
+    @property
+    def queued(self) -> int:
+        return max(self.in_flight - self.max_workers, 0)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+    def hash(self, password: str) -> str:
+        return self._run(
+            generate_password_hash, password, self.method, self.salt_length
+        )
+
+    def check(self, pwhash: str, password: str) -> bool:
+        return self._run(check_password_hash, pwhash, password)
+
+    @cached_property
+    def stored_method(self) -> str:
+        """
+        `method` as werkzeug writes it into hashes, e.g. "pbkdf2:sha512"
+        is stored with the default iterations as "pbkdf2:sha512:<iterations>".
+        """
+
+        return generate_password_hash("", self.method, 1).partition("$")[0]
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        method, _, salted = pwhash.partition("$")
+        salt, _, _ = salted.partition("$")
+
+        return method != self.stored_method or len(salt) != self.salt_length
+
+    def _run(self, func: Callable[..., T], *args) -> T:
+        if not self.max_workers:
+            return func(*args)
+
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusyError
+
+        self.in_flight += 1
+
+        try:
+            return self.pool.apply(func, args)
+        finally:
+            self.in_flight -= 1
+
+
+def calibrate_iterations(
+    algorithm: str, target: float, rounds: int = 5, base: int = 10000
+) -> tuple[int, float]:
+    """
+    PBKDF2 iterations of `algorithm` taking about `target` seconds to verify
+    on this machine and the median verify time measured with them.
+    PBKDF2 time is linear in iterations, so one measurement is scaled.
+    """
+
+    def measure(iterations: int) -> float:
+        pwhash = generate_password_hash("password", f"pbkdf2:{algorithm}:{iterations}")
+        timings = []
+
+        for _ in range(rounds):
+            started = perf_counter()
+            check_password_hash(pwhash, "password")
+            timings.append(perf_counter() - started)
+
+        return sorted(timings)[rounds // 2]
+
+    iterations = max(int(round(base * target / measure(base), -3)), 1000)
+
+    return iterations, measure(iterations)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASHING.MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASHING.MAX_QUEUE,
+    method=settings.PASSWORD_HASHING.METHOD,
+    salt_length=settings.PASSWORD_HASHING.SALT_LENGTH,
+)
+
+metrics.register("password_hashing", lambda: password_hasher.stats)
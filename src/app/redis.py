@@ -1,7 +1,118 @@
-from redis import StrictRedis
+from time import monotonic
+from typing import Callable, Optional
 
+from redis import BlockingConnectionPool, StrictRedis, exceptions
+
+from app.metrics import metrics
 from app.settings import settings
 
-redis_conn = StrictRedis(
-    host=settings.REDIS.HOST, port=settings.REDIS.PORT, decode_responses=True
+
+class CircuitBreakerError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Fails fast instead of piling greenlets onto an unavailable redis.
+
+    Opens after `failure_threshold` consecutive connection errors or timeouts,
+    rejects calls for `reset_timeout` seconds and then lets a single
+    trial call through: success closes the breaker, failure opens it again.
+    """
+
+    FAILURES = (exceptions.ConnectionError, exceptions.TimeoutError)
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+
+        if monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+
+        return "half-open"
+
+    def call(self, method: Callable, /, *args, **kwargs):
+        state = self.state
+        opened_at = self.opened_at
+
+        if state == "open":
+            self.rejected += 1
+            raise CircuitBreakerError
+
+        if state == "half-open":
+            # keep rejecting the others until the trial call is done
+            self.opened_at = monotonic()
+
+        try:
+            result = method(*args, **kwargs)
+        except self.FAILURES:
+            self.failures += 1
+
+            if state == "half-open" or self.failures >= self.failure_threshold:
+                self.opened_at = monotonic()
+
+            raise
+        except BaseException:
+            if state == "half-open":
+                # redis may well be down, let the next call try again
+                self.opened_at = opened_at
+
+            raise
+
+        self.failures = 0
+        self.opened_at = None
+
+        return result
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
+
+
+redis_pool = BlockingConnectionPool(
+    host=settings.REDIS.HOST,
+    port=settings.REDIS.PORT,
+    decode_responses=True,
+    max_connections=settings.REDIS.MAX_CONNECTIONS,
+    timeout=settings.REDIS.POOL_TIMEOUT,
+    socket_timeout=settings.REDIS.SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS.SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=settings.REDIS.HEALTH_CHECK_INTERVAL,
+    retry_on_timeout=settings.REDIS.RETRY_ON_TIMEOUT,
 )
+redis_conn = StrictRedis(connection_pool=redis_pool)
+
+redis_breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS.BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.REDIS.BREAKER_RESET_TIMEOUT,
+)
+
+
+def get_pool_stats() -> dict:
+    # Private attributes of BlockingConnectionPool, may change with redis-py.
+    created = len(getattr(redis_pool, "_connections", ()))
+    queue = getattr(getattr(redis_pool, "pool", None), "queue", ())
+    idle = sum(1 for conn in queue if conn is not None)
+
+    return {
+        "max_connections": redis_pool.max_connections,
+        "created": created,
+        "in_use": created - idle,
+        "idle": idle,
+    }
+
+
+metrics.register("redis_pool", get_pool_stats)
+metrics.register("redis_breaker", lambda: redis_breaker.stats)
@@ -0,0 +1,119 @@
+import pickle
+from abc import ABC, abstractmethod
+from typing import Any
+
+import msgpack
+import orjson
+import zstandard
+
+
+class SerializerError(Exception):
+    pass
+
+
+class Serializer(ABC):  # pragma: no cover
+    """`loads` raises SerializerError for data it can't read."""
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        pass
+
+
+class JSONSerializer(Serializer):
+    """
+    Readable by non-Python consumers. Tuples come back as lists,
+    datetimes as ISO strings.
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as err:
+            raise SerializerError from err
+
+
+class MsgpackSerializer(Serializer):
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return msgpack.unpackb(data, raw=False)
+        except ValueError as err:
+            raise SerializerError from err
+
+
+class PickleSerializer(Serializer):
+    """Only for trusted storages, loading a pickle can execute code."""
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: bytes) -> Any:
+        # Unpickling fails in many ways, e.g. with classes moved since dumping.
+        try:
+            return pickle.loads(data)
+        except Exception as err:
+            raise SerializerError from err
+
+
+class CompressedSerializer(Serializer):
+    """Compresses payloads of `threshold` bytes and more with zstd."""
+
+    RAW = b"r"
+    ZSTD = b"z"
+
+    def __init__(self, serializer: Serializer, threshold: int, level: int = 3) -> None:
+        self.serializer = serializer
+        self.threshold = threshold
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def dumps(self, value: Any) -> bytes:
+        data = self.serializer.dumps(value)
+
+        if len(data) < self.threshold:
+            return self.RAW + data
+
+        return self.ZSTD + self._compressor.compress(data)
+
+    def loads(self, data: bytes) -> Any:
+        marker, data = data[:1], data[1:]
+
+        if marker == self.ZSTD:
+            try:
+                data = self._decompressor.decompress(data)
+            except zstandard.ZstdError as err:
+                raise SerializerError from err
+        elif marker != self.RAW:
+            raise SerializerError("Uncompressed payload.")
+
+        return self.serializer.loads(data)
+
+
+SERIALIZERS = {
+    "json": JSONSerializer,
+    "msgpack": MsgpackSerializer,
+    "pickle": PickleSerializer,
+}
+
+
+def get_serializer(name: str, compress_threshold: int = 0) -> Serializer:
+    """A zero threshold disables compression."""
+
+    try:
+        serializer = SERIALIZERS[name]()
+    except KeyError as err:
+        raise SerializerError(f"Unknown serializer {name!r}.") from err
+
+    if compress_threshold:
+        return CompressedSerializer(serializer, compress_threshold)
+
+    return serializer
@@ -1,17 +1,25 @@
 from datetime import datetime
-from uuid import uuid4
+from time import time
+from typing import Optional
+from uuid import UUID, uuid4
 
 from flask import Request
 from flask_jwt_extended import create_access_token, create_refresh_token
-from user_agents import parse
-
-from app.database import session_scope, db
-from app.models import User, AuthHistory, PlatformEnum
+from sqlalchemy.orm import Session, joinedload
+
+from app.cache import response_cache
+from app.database import session_scope
+from app.models import Role, User
+from app.passwords import password_hasher, PasswordHasherBusyError
+from app.services.auth_history import auth_history_writer
+from app.services.devices import device_classifier
 from app.services.storages import (
     token_storage,
     InvalidTokenError,
     TokenStorageError,
 )
+from app.settings import settings
+from app.timing import server_timing
 
 
 class AccountsServiceError(Exception):
@@ -27,42 +35,85 @@ class AccountsService:
         self.user = user
 
     def login(self, request: Request) -> tuple[str, str]:
-        self.record_entry_time(request)
+        """
+        Tokens are made before the commit expires the user, so the
+        login costs a single transaction: the last_login update and
+        the history insert.
+        """
 
-        try:
+        user_id = self.user.id
+
+        with server_timing("tokens"):
             access_token, refresh_token = self.get_token_pair()
-        except TokenStorageError as err:
-            raise AccountsServiceError from err
 
-        with session_scope():
+        with server_timing("commit"), session_scope() as session:
             self.user.last_login = datetime.utcnow()
+            self.record_entry_time(request, session)
+
+        response_cache.invalidate(user_id)
 
         return access_token, refresh_token
 
     @staticmethod
     def get_authorized_user(login: str, password: str) -> User:
-        user = User.query.filter_by(login=login).one_or_none()
+        with server_timing("user"):
+            user = (
+                User.query.options(joinedload(User.roles))
+                .filter_by(login=login)
+                .one_or_none()
+            )
+
+        with server_timing("password"):
+            if not user or not user.check_password(password):
+                raise AccountsServiceError
 
-        if not user or not user.check_password(password):
-            raise AccountsServiceError
+        if password_hasher.needs_rehash(user.password):
+            # Hash parameters changed since the password was set, the
+            # plain password is only known now.
+            try:
+                with session_scope():
+                    user.password = password
+            except PasswordHasherBusyError:
+                pass
 
         return user
 
     def refresh_token_pair(self, refresh_token_jti: str) -> tuple[str, str]:
+        access_token, refresh_token, new_refresh_token_jti = self._create_token_pair()
+
         try:
-            token_storage.validate_refresh_token(refresh_token_jti, self.user.id)
+            token_storage.rotate_refresh_token(
+                refresh_token_jti, new_refresh_token_jti, self.user.id
+            )
         except InvalidTokenError as err:
-            token_storage.invalidate_current_refresh_token(self.user.id)
             raise BadAuthorizationError from err
 
-        return self.get_token_pair()
+        return access_token, refresh_token
 
     def get_token_pair(self) -> tuple[str, str]:
+        access_token, refresh_token, refresh_token_jti = self._create_token_pair()
+
+        try:
+            token_storage.set_refresh_token(refresh_token_jti, self.user.id)
+        except TokenStorageError as err:
+            raise AccountsServiceError from err
+
+        return access_token, refresh_token
+
+    def _create_token_pair(self) -> tuple[str, str, str]:
+        # Watermarks are compared with milliseconds, so that tokens issued
+        # right after a revocation within the same second stay valid.
+        issued_at = int(time() * 1000)
+
         access_token = create_access_token(
             identity=self.user,
             additional_claims={
                 "is_admin": self.user.is_admin,
                 "roles": self.user.roles_names_list,
+                "login": self.user.login,
+                "email": self.user.email,
+                "active": self.user.is_active,
+                "iat_ms": issued_at,
             },
         )
 
@@ -71,39 +122,71 @@ class AccountsService:
             identity=self.user,
             additional_claims={
                 "jti": refresh_token_jti,
+                "iat_ms": issued_at,
             },
         )
 
+        return access_token, refresh_token, refresh_token_jti
+
+    def record_entry_time(
+        self, request: Request, session: Optional[Session] = None
+    ) -> None:
+        device_info = device_classifier.classify(request.user_agent.string)
+
+        auth_history_writer.write(
+            session,
+            id=uuid4(),
+            user_id=self.user.id,
+            timestamp=datetime.utcnow(),
+            user_agent=request.user_agent.string,
+            ip_addr=request.remote_addr,
+            device=device_info.device,
+            platform=device_info.platform,
+        )
+
+    @staticmethod
+    def logout(access_token: dict) -> None:
         try:
-            token_storage.set_refresh_token(refresh_token_jti, self.user.id)
+            token_storage.invalidate_token_pair(
+                access_token["jti"], access_token["exp"], access_token["sub"]
+            )
         except TokenStorageError as err:
             raise AccountsServiceError from err
 
-        return access_token, refresh_token
-
-    def record_entry_time(self, request: Request) -> None:
-        user_agent = parse(request.user_agent.string)
-
-        platform = PlatformEnum.pc
+    @staticmethod
+    def logout_everywhere(*user_ids: UUID) -> None:
+        """Revokes every token issued to the users so far."""
 
-        if user_agent.is_mobile:
-            platform = PlatformEnum.mobile
-        elif user_agent.is_tablet:
-            platform = PlatformEnum.tablet
+        try:
+            token_storage.set_watermark(list(user_ids), int(time() * 1000))
+        except TokenStorageError as err:
+            raise AccountsServiceError from err
 
-        with session_scope():
-            history = AuthHistory(
-                user_id=self.user.id,
-                user_agent=request.user_agent.string,
-                ip_addr=request.remote_addr,
-                device=user_agent.device,
-                platform=platform,
+    @staticmethod
+    def logout_role(role: Role) -> None:
+        """
+        Revokes every token issued so far to the users holding the role.
+        Their ids are streamed from the database, never all loaded at once.
+        """
+
+        issued_before = int(time() * 1000)
+        user_ids = (
+            user_id
+            for user_id, in role.users.with_entities(User.id).yield_per(
+                settings.BLOCKLIST.WATERMARK_BATCH_SIZE
             )
-            db.session.add(history)
+        )
+
+        try:
+            token_storage.set_watermark(user_ids, issued_before)
+        except TokenStorageError as err:
+            raise AccountsServiceError from err
 
     @staticmethod
-    def logout(access_token_jti: str, user_id: int) -> None:
+    def revoke_all_tokens() -> None:
+        """Revokes every token issued so far, e.g. after a key compromise."""
+
         try:
-            token_storage.invalidate_token_pair(access_token_jti, user_id)
+            token_storage.set_global_watermark(int(time() * 1000))
         except TokenStorageError as err:
             raise AccountsServiceError from err
@@ -0,0 +1,132 @@
+import logging
+from time import monotonic
+from typing import Optional
+
+import gevent
+from flask import Flask, current_app
+from gevent.queue import Empty, Full, Queue
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert
+
+from app.cache import response_cache
+from app.database import session_scope
+from app.metrics import metrics
+from app.models import AuthHistory
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuthHistoryWriter:
+    """
+    Takes login history off the login path: rows are queued and a
+    background greenlet inserts them in batches of up to `batch_size`
+    rows at least every `flush_interval` seconds. Rows still queued when
+    the worker dies are lost, so `flush_interval` is the data loss window.
+
+    When the queue is full, rows are written synchronously, which slows
+    logins down instead of dropping history.
+    """
+
+    def __init__(
+        self, enabled: bool, max_size: int, batch_size: int, flush_interval: float
+    ) -> None:
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.written_sync = 0
+        self.failed = 0
+
+        self._queue: Queue = Queue(maxsize=max_size)
+        self._app: Optional[Flask] = None
+        self._flusher: Optional[gevent.Greenlet] = None
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "written_sync": self.written_sync,
+            "failed": self.failed,
+        }
+
+    def write(self, session: Optional[Session] = None, **row) -> None:
+        """
+        A row written synchronously within the given `session` is committed
+        and invalidated in the responses cache by the caller.
+        """
+
+        if self.enabled:
+            self.start()
+
+            try:
+                self._queue.put_nowait(row)
+                return
+            except Full:
+                pass
+
+        if session is None:
+            self._insert([row])
+        else:
+            session.execute(self._make_statement([row]))
+
+        self.written_sync += 1
+
+    def start(self) -> None:
+        if self._flusher is None or self._flusher.dead:
+            self._app = current_app._get_current_object()
+            self._flusher = gevent.spawn(self._flush_loop)
+
+    def flush(self) -> None:
+        """Writes queued rows in the calling greenlet."""
+
+        rows = []
+
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+
+        if rows:
+            self._insert(rows)
+            self.written += len(rows)
+
+    def _flush_loop(self) -> None:
+        while True:
+            rows = [self._queue.get()]
+            deadline = monotonic() + self.flush_interval
+
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get(timeout=deadline - monotonic()))
+                except Empty:
+                    break
+
+            try:
+                with self._app.app_context():
+                    self._insert(rows)
+            except Exception:
+                logger.exception("Failed to write %s auth history rows.", len(rows))
+                self.failed += len(rows)
+            else:
+                self.written += len(rows)
+
+    @staticmethod
+    def _make_statement(rows: list[dict]) -> Insert:
+        # A single multi-row INSERT per batch.
+        return AuthHistory.__table__.insert().values(rows)
+
+    def _insert(self, rows: list[dict]) -> None:
+        with session_scope() as session:
+            session.execute(self._make_statement(rows))
+
+        response_cache.invalidate(*{row["user_id"] for row in rows})
+
+
+auth_history_writer = AuthHistoryWriter(
+    enabled=settings.AUTH_HISTORY.ASYNC,
+    max_size=settings.AUTH_HISTORY.QUEUE_SIZE,
+    batch_size=settings.AUTH_HISTORY.BATCH_SIZE,
+    flush_interval=settings.AUTH_HISTORY.FLUSH_INTERVAL,
+)
+
+metrics.register("auth_history", lambda: auth_history_writer.stats)
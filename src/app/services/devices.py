@@ -0,0 +1,84 @@
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from user_agents import parse
+
+from app.cache import LocalCache
+from app.database import db
+from app.metrics import metrics
+from app.models import AuthHistory, PlatformEnum
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    device: str
+    platform: PlatformEnum
+
+    @classmethod
+    def from_user_agent(cls, user_agent: str) -> "DeviceInfo":
+        parsed = parse(user_agent)
+        platform = PlatformEnum.pc
+
+        if parsed.is_mobile:
+            platform = PlatformEnum.mobile
+        elif parsed.is_tablet:
+            platform = PlatformEnum.tablet
+
+        return cls(device=parsed.device.family, platform=platform)
+
+
+class DeviceClassifier:
+    """
+    Memoizes user agent parsing, which runs a long cascade of regexes.
+    Most logins come with a handful of distinct user agent strings,
+    so a bounded LRU keyed by the raw string answers nearly all of them.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.storage = LocalCache(max_size=max_size)
+
+    def classify(self, user_agent: str) -> DeviceInfo:
+        info = self.storage.get(user_agent)
+
+        if info is None:
+            info = DeviceInfo.from_user_agent(user_agent)
+            self.storage.set(user_agent, info)
+
+        return info
+
+    def warm_up(self, size: int, days: int) -> None:
+        """
+        Parses the most frequent user agents of the last `days` of the login
+        history. The cache is only a head start, so a failed query is
+        logged and the classifier starts cold.
+        """
+
+        try:
+            user_agents = (
+                db.session.query(AuthHistory.user_agent)
+                .filter(AuthHistory.timestamp >= func.now() - timedelta(days=days))
+                .group_by(AuthHistory.user_agent)
+                .order_by(func.count().desc())
+                .limit(min(size, self.storage.max_size))
+                .all()
+            )
+        except SQLAlchemyError:
+            logger.exception("Failed to warm up the user agent cache.")
+            return
+        finally:
+            db.session.remove()
+
+        # The least frequent first, so that they are evicted first.
+        for (user_agent,) in reversed(user_agents):
+            self.storage.set(user_agent, DeviceInfo.from_user_agent(user_agent))
+
+
+device_classifier = DeviceClassifier(max_size=settings.DEVICES.CACHE_SIZE)
+
+metrics.register("devices", lambda: device_classifier.storage.stats)
@@ -0,0 +1,149 @@
+import csv
+import gzip
+from contextlib import contextmanager
+from enum import Enum
+from io import TextIOWrapper
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+import orjson
+import zstandard
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from app.database import db
+from app.models import AuthHistory, Role, RolesUsers, User
+
+
+class ExportError(Exception):
+    pass
+
+
+def get_users_statement() -> Select:
+    return (
+        select(
+            User.id,
+            User.login,
+            User.email,
+            User.active,
+            User.last_login,
+            User.created_on,
+            func.array_remove(func.array_agg(Role.name), None).label("roles"),
+        )
+        .outerjoin(RolesUsers, RolesUsers.user_id == User.id)
+        .outerjoin(Role, Role.id == RolesUsers.role_id)
+        .group_by(User.id)
+    )
+
+
+def get_history_statement() -> Select:
+    return select(
+        AuthHistory.id,
+        AuthHistory.user_id,
+        AuthHistory.timestamp,
+        AuthHistory.user_agent,
+        AuthHistory.ip_addr,
+        AuthHistory.device,
+        AuthHistory.platform,
+    )
+
+
+STATEMENTS = {
+    "users": get_users_statement,
+    "history": get_history_statement,
+}
+
+
+@contextmanager
+def open_output(path: Path, compression: str) -> Iterator[BinaryIO]:
+    if compression == "none":
+        with path.open("wb") as file:
+            yield file
+    elif compression == "gzip":
+        with gzip.open(path, "wb") as file:
+            yield file
+    elif compression == "zstd":
+        with path.open("wb") as file:
+            with zstandard.ZstdCompressor().stream_writer(file) as writer:
+                yield writer
+    else:
+        raise ExportError(f"Unknown compression {compression}.")
+
+
+def write_ndjson(rows: Iterator[dict], file: BinaryIO) -> int:
+    count = 0
+
+    for count, row in enumerate(rows, start=1):
+        file.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+
+    return count
+
+
+def to_csv_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return ",".join(value)
+
+    if isinstance(value, Enum):
+        return value.value
+
+    return value
+
+
+def write_csv(rows: Iterator[dict], file: BinaryIO) -> int:
+    text = TextIOWrapper(file, encoding="utf-8", newline="", write_through=True)
+    writer = None
+    count = 0
+
+    for count, row in enumerate(rows, start=1):
+        if writer is None:
+            writer = csv.DictWriter(text, fieldnames=list(row))
+            writer.writeheader()
+
+        writer.writerow({key: to_csv_value(value) for key, value in row.items()})
+
+    # Leaves the file to be closed by its owner.
+    text.detach()
+
+    return count
+
+
+WRITERS = {
+    "ndjson": write_ndjson,
+    "csv": write_csv,
+}
+
+
+class Exporter:
+    """
+    Streams a table from a server-side cursor, holding at most
+    `batch_size` rows in memory whatever the size of the table.
+    """
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+
+    def rows(self, statement: Select) -> Iterator[dict]:
+        # Unlike the session result, a CursorResult of the connection
+        # can be closed to release the server-side cursor early.
+        connection = db.session.connection().execution_options(
+            stream_results=True, max_row_buffer=self.batch_size
+        )
+        result = connection.execute(statement)
+
+        try:
+            for row in result:
+                yield dict(row._mapping)
+        finally:
+            result.close()
+
+    def export(
+        self, name: str, path: Path, file_format: str, compression: str = "none"
+    ) -> int:
+        if name not in STATEMENTS:
+            raise ExportError(f"Unknown export {name}.")
+
+        if file_format not in WRITERS:
+            raise ExportError(f"Unknown format {file_format}.")
+
+        with open_output(path, compression) as file:
+            return WRITERS[file_format](self.rows(STATEMENTS[name]()), file)
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+from uuid import UUID
+
+from sqlalchemy.orm import joinedload
+
+from app.cache import LocalCache
+from app.metrics import metrics
+from app.models import DefaultRoleEnum, User
+from app.settings import settings
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Session-free view of a user with everything request handlers need.
+    Safe to share between requests, unlike a SQLAlchemy instance.
+    """
+
+    id: UUID
+    login: str
+    email: Optional[str]
+    active: bool
+    roles: tuple[str, ...]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            login=user.login,
+            email=user.email,
+            active=bool(user.active),
+            roles=tuple(user.roles_names_list),
+        )
+
+    @classmethod
+    def from_claims(cls, claims: dict) -> "UserSnapshot":
+        """
+        Build a snapshot from verified access token claims only.
+        The data is as fresh as the token, i.e. up to JWT.ACCESS_TOKEN_EXPIRES old.
+        """
+
+        return cls(
+            id=UUID(claims["sub"]),
+            login=claims.get("login"),
+            email=claims.get("email"),
+            active=claims.get("active", True),
+            roles=tuple(claims.get("roles", ())),
+        )
+
+    @property
+    def is_active(self) -> bool:
+        return self.active
+
+    @property
+    def is_admin(self) -> bool:
+        return self.has_role(DefaultRoleEnum.staff.value) or self.has_role(
+            DefaultRoleEnum.superuser.value
+        )
+
+    @property
+    def roles_names_list(self) -> list[str]:
+        return list(self.roles)
+
+    def has_role(self, role_name: str) -> bool:
+        return role_name in self.roles
+
+
+class IdentityCache:
+    """
+    Per-worker cache of user snapshots keyed by the jwt sub.
+    Entries of other workers are not invalidated explicitly,
+    they expire after IDENTITY_CACHE.TTL seconds.
+    """
+
+    def __init__(self, max_size: int, ttl: int) -> None:
+        self.storage = LocalCache(max_size=max_size, ttl=ttl)
+
+    def get_user(self, user_id: Union[str, UUID]) -> Optional[UserSnapshot]:
+        key = str(user_id)
+        snapshot = self.storage.get(key)
+
+        if snapshot is not None:
+            return snapshot
+
+        user = (
+            User.query.options(joinedload(User.roles))
+            .filter_by(id=user_id)
+            .one_or_none()
+        )
+
+        if not user:
+            return None
+
+        snapshot = UserSnapshot.from_user(user)
+        self.storage.set(key, snapshot)
+
+        return snapshot
+
+    def invalidate(self, *user_ids: Union[str, UUID]) -> None:
+        self.storage.delete(*(str(user_id) for user_id in user_ids))
+
+    def clear(self) -> None:
+        self.storage.clear()
+
+
+identity_cache = IdentityCache(
+    max_size=settings.IDENTITY_CACHE.MAX_SIZE, ttl=settings.IDENTITY_CACHE.TTL
+)
+
+metrics.register("identity_cache", lambda: identity_cache.storage.stats)
@@ -0,0 +1,157 @@
+import csv
+import os
+from functools import partial
+from io import StringIO
+from itertools import islice
+from typing import Iterable, Iterator, Optional, TextIO
+from uuid import UUID, uuid4
+
+import orjson
+from gevent.threadpool import ThreadPool
+from werkzeug.security import generate_password_hash
+
+from app.database import db
+from app.models import DefaultRoleEnum, Role
+from app.passwords import password_hasher
+from app.settings import settings
+
+
+class UserImportError(Exception):
+    pass
+
+
+def read_users(file: TextIO, file_format: str) -> Iterator[dict]:
+    """
+    Records with login, optional email and either a plain `password`
+    or a `password_hash` made by werkzeug.
+    """
+
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+    elif file_format == "ndjson":
+        for line in file:
+            if line.strip():
+                yield orjson.loads(line)
+    else:
+        raise UserImportError(f"Unknown format {file_format}.")
+
+
+class UserImporter:
+    """
+    Loads users in batches: passwords are hashed across a pool of native
+    threads, as hashlib releases the GIL and a process pool does not work
+    under gevent, each batch is COPYed into a temporary table and moved
+    into users with the guest role in a single statement. Users whose
+    login or email already exist are skipped, so an interrupted import
+    can be rerun. Records without a login or a password are skipped too.
+    """
+
+    COLUMNS = ("id", "login", "email", "password")
+
+    def __init__(self, batch_size: int, workers: Optional[int] = None) -> None:
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self._hash = partial(
+            generate_password_hash,
+            method=password_hasher.method,
+            salt_length=password_hasher.salt_length,
+        )
+
+    @staticmethod
+    def is_valid(record: dict) -> bool:
+        return bool(
+            (record.get("login") or "").strip()
+            and (record.get("password") or record.get("password_hash"))
+        )
+
+    def run(
+        self, records: Iterable[dict], skip: int = 0
+    ) -> Iterator[tuple[int, int, int]]:
+        """
+        Yields numbers of processed, imported and invalid skipped records
+        after each batch.
+        """
+
+        role_id = Role.query.filter_by(name=DefaultRoleEnum.guest.value).one().id
+        records = iter(records)
+        # The first `skip` records are only read.
+        processed = sum(1 for _ in islice(records, skip))
+        imported = 0
+        skipped = 0
+        pool = ThreadPool(self.workers)
+
+        try:
+            while True:
+                batch = list(islice(records, self.batch_size))
+
+                if not batch:
+                    break
+
+                valid = [record for record in batch if self.is_valid(record)]
+
+                if valid:
+                    imported += self._copy(self._make_rows(pool, valid), role_id)
+
+                processed += len(batch)
+                skipped += len(batch) - len(valid)
+
+                yield processed, imported, skipped
+        finally:
+            pool.kill()
+
+    def _make_rows(self, pool: ThreadPool, batch: list[dict]) -> list[tuple]:
+        plain = [record for record in batch if not record.get("password_hash")]
+        hashes = pool.map(self._hash, [record["password"] for record in plain])
+
+        for record, pwhash in zip(plain, hashes):
+            record["password_hash"] = pwhash
+
+        return [
+            (
+                uuid4(),
+                record["login"],
+                record.get("email") or None,
+                record["password_hash"],
+            )
+            for record in batch
+        ]
+
+    def _copy(self, rows: list[tuple], role_id: UUID) -> int:
+        buffer = StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        schema = settings.DB.SCHEMA
+        columns = ", ".join(self.COLUMNS)
+        conn = db.engine.raw_connection()
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "CREATE TEMPORARY TABLE IF NOT EXISTS import_users "
+                    f"(LIKE {schema}.users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+                )
+                cursor.copy_expert(
+                    f"COPY import_users ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                cursor.execute(
+                    f"""
+                    WITH imported AS (
+                        INSERT INTO {schema}.users ({columns}, active)
+                        SELECT {columns}, true FROM import_users
+                        ON CONFLICT DO NOTHING
+                        RETURNING id
+                    )
+                    INSERT INTO {schema}.roles_users (user_id, role_id)
+                    SELECT id, %(role_id)s::uuid FROM imported
+                    """,
+                    {"role_id": str(role_id)},
+                )
+                imported = cursor.rowcount
+
+            conn.commit()
+        finally:
+            conn.close()
+
+        return imported
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from app.services.revocation import RevocationService
+from app.services.storages import TokenStorageError
+
+
+class IntrospectionServiceError(Exception):
+    pass
+
+
+class IntrospectionService:
+    @staticmethod
+    def introspect(tokens: list[str]) -> list[dict]:
+        """
+        Verifies the signatures in-process, using the same keys as
+        the JWT-protected endpoints, and checks the revocation
+        of all the valid tokens at once.
+        """
+
+        payloads: list[Optional[dict]] = []
+
+        for token in tokens:
+            try:
+                payloads.append(decode_token(token))
+            except (PyJWTError, JWTExtendedException):
+                payloads.append(None)
+
+        verified = [payload for payload in payloads if payload]
+
+        try:
+            revoked = iter(RevocationService.are_tokens_revoked(verified))
+        except TokenStorageError as err:
+            raise IntrospectionServiceError from err
+
+        result = []
+
+        for payload in payloads:
+            if not payload or next(revoked):
+                result.append({"active": False})
+                continue
+
+            result.append(
+                {
+                    "active": True,
+                    "sub": payload["sub"],
+                    "type": payload["type"],
+                    "roles": payload.get("roles", []),
+                    "exp": payload["exp"],
+                }
+            )
+
+        return result
@@ -0,0 +1,195 @@
+import logging
+import re
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import db, session_scope
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_idx = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_idx + 1, 1)
+
+
+class MonthlyPartitions:
+    """
+    Lifecycle of the monthly RANGE partitions of a table partitioned
+    by a timestamp `column`, named `<table>_y<year>m<month>`.
+    """
+
+    def __init__(
+        self, table: str, schema: str, column: str, premake: int, retention: int
+    ) -> None:
+        self.table = table
+        self.schema = schema
+        self.column = column
+        self.premake = premake
+        self.retention = retention
+        self._name_pattern = re.compile(rf"^{table}_y(\d{{4}})m(\d{{2}})$")
+
+    def get_name(self, month: date) -> str:
+        return f"{self.table}_y{month:%Y}m{month:%m}"
+
+    def get_partitions(self) -> dict[date, str]:
+        """Attached monthly partitions by their first day, oldest first."""
+
+        names = db.session.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_namespace ON pg_namespace.oid = parent.relnamespace
+                WHERE parent.relname = :table AND pg_namespace.nspname = :schema
+                ORDER BY child.relname
+                """
+            ),
+            {"table": self.table, "schema": self.schema},
+        ).scalars()
+        partitions = {}
+
+        for name in names:
+            match = self._name_pattern.match(name)
+
+            if match:
+                partitions[date(int(match[1]), int(match[2]), 1)] = name
+
+        return partitions
+
+    def get_default(self) -> Optional[str]:
+        return db.session.execute(
+            text(
+                """
+                SELECT child.relname
+                FROM pg_partitioned_table
+                JOIN pg_class parent ON parent.oid = pg_partitioned_table.partrelid
+                JOIN pg_class child ON child.oid = pg_partitioned_table.partdefid
+                JOIN pg_namespace ON pg_namespace.oid = parent.relnamespace
+                WHERE parent.relname = :table AND pg_namespace.nspname = :schema
+                """
+            ),
+            {"table": self.table, "schema": self.schema},
+        ).scalar()
+
+    def create(self, today: Optional[date] = None) -> list[str]:
+        """
+        Partitions from the current month to `premake` months ahead, each
+        in its own transaction: a month that fails is logged and skipped.
+        """
+
+        today = today or date.today()
+        existing = self.get_partitions()
+        default = self.get_default()
+        created = []
+
+        for months in range(self.premake + 1):
+            month = add_months(date(today.year, today.month, 1), months)
+
+            if month in existing:
+                continue
+
+            name = self.get_name(month)
+
+            try:
+                with session_scope() as session:
+                    self._create_partition(session, month, name, default)
+            except SQLAlchemyError:
+                logger.exception("Failed to create partition %s.", name)
+                continue
+
+            created.append(name)
+
+        return created
+
+    def _create_partition(
+        self, session: Session, month: date, name: str, default: Optional[str]
+    ) -> None:
+        parent = f'"{self.schema}"."{self.table}"'
+        partition = f'"{self.schema}"."{name}"'
+        create = text(
+            f"CREATE TABLE {partition} PARTITION OF {parent} "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+
+        in_month = f'"{self.column}" >= :start AND "{self.column}" < :end'
+        bounds = {"start": month, "end": add_months(month, 1)}
+        default = default and f'"{self.schema}"."{default}"'
+        stray = (
+            default
+            and session.execute(
+                text(f"SELECT EXISTS (SELECT FROM {default} WHERE {in_month})"), bounds
+            ).scalar()
+        )
+
+        if not stray:
+            session.execute(create)
+            return
+
+        # Rows of the month written to the default partition, e.g. after
+        # a missed run, would fail the creation: they are moved over while
+        # the default partition is detached.
+        session.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {default}"))
+        session.execute(create)
+        session.execute(
+            text(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {default} WHERE {in_month} RETURNING *
+                )
+                INSERT INTO {partition} SELECT * FROM moved
+                """
+            ),
+            bounds,
+        )
+        session.execute(
+            text(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT")
+        )
+
+    def expire(self, today: Optional[date] = None, drop: bool = False) -> list[str]:
+        """
+        Detaches partitions older than `retention` months, the detached
+        tables are kept for archiving unless `drop` is set.
+        """
+
+        if not self.retention:
+            return []
+
+        today = today or date.today()
+        oldest_kept = add_months(date(today.year, today.month, 1), -self.retention)
+        expired = []
+
+        with session_scope() as session:
+            for month, name in sorted(self.get_partitions().items()):
+                if month >= oldest_kept:
+                    break
+
+                session.execute(
+                    text(
+                        f'ALTER TABLE "{self.schema}"."{self.table}" '
+                        f'DETACH PARTITION "{self.schema}"."{name}"'
+                    )
+                )
+
+                if drop:
+                    session.execute(text(f'DROP TABLE "{self.schema}"."{name}"'))
+
+                expired.append(name)
+
+        return expired
+
+
+auth_history_partitions = MonthlyPartitions(
+    table="auth_history",
+    schema=settings.DB.SCHEMA,
+    column="timestamp",
+    premake=settings.AUTH_HISTORY.PREMAKE_MONTHS,
+    retention=settings.AUTH_HISTORY.RETENTION_MONTHS,
+)
@@ -0,0 +1,295 @@
+import logging
+from dataclasses import dataclass
+from math import ceil
+from time import monotonic, time
+from typing import Optional, Union
+
+import gevent
+from gevent.queue import Queue
+from redis.client import StrictRedis
+
+from app.cache import LocalCache
+from app.metrics import metrics
+from app.redis import redis_conn, redis_breaker
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(ceil(self.reset_after)),
+        }
+
+        if not self.allowed:
+            headers["Retry-After"] = str(ceil(self.retry_after))
+
+        return headers
+
+
+class GCRARateLimiter:
+    """
+    Generic cell rate algorithm: allows `limit` requests per `period`
+    seconds with no bursts at window boundaries. The only state is the
+    theoretical arrival time of the next request, one small key per client.
+    """
+
+    # KEYS[1] - client key
+    # ARGV[1] - now, ms; ARGV[2] - emission interval, ms;
+    # ARGV[3] - period, ms; ARGV[4] - cost
+    # Returns {allowed, remaining, reset after ms, retry after ms}.
+    SCRIPT = """
+        local now = tonumber(ARGV[1])
+        local interval = tonumber(ARGV[2])
+        local period = tonumber(ARGV[3])
+        local cost = tonumber(ARGV[4])
+
+        local tat = tonumber(redis.call("GET", KEYS[1]))
+
+        if not tat or tat < now then
+            tat = now
+        end
+
+        local new_tat = tat + cost * interval
+        local diff = now - (new_tat - period)
+
+        if diff < 0 then
+            local remaining = math.floor((now - (tat - period)) / interval)
+            return {0, math.max(remaining, 0), tat - now, -diff}
+        end
+
+        redis.call("SET", KEYS[1], new_tat, "PX", new_tat - now)
+        return {1, math.floor(diff / interval), new_tat - now, 0}
+    """
+
+    def __init__(self, redis: StrictRedis, limit: int, period: int) -> None:
+        self.redis = redis
+        self.limit = limit
+        self.period = period
+        self._script = self.redis.register_script(self.SCRIPT)
+
+    def hit(self, key: bytes, cost: int = 1) -> RateLimitResult:
+        period_ms = self.period * 1000
+        interval_ms = max(period_ms // self.limit, 1)
+
+        try:
+            allowed, remaining, reset_after, retry_after = redis_breaker.call(
+                self._script,
+                keys=[key],
+                args=[int(time() * 1000), interval_ms, period_ms, cost],
+                client=self.redis,
+            )
+        except Exception as err:
+            raise RateLimitError from err
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limit,
+            remaining=remaining,
+            reset_after=reset_after / 1000,
+            retry_after=retry_after / 1000,
+        )
+
+
+class LocalBucket:
+    def __init__(self) -> None:
+        self.tokens = 0
+        self.reset_at = 0.0
+        self.retry_at = 0.0
+
+    def result(self, limit: int, allowed: bool) -> RateLimitResult:
+        now = monotonic()
+
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=self.tokens,
+            reset_after=max(self.reset_at - now, 0),
+            retry_after=max(self.retry_at - now, 0),
+        )
+
+
+class HybridRateLimiter:
+    """
+    Admits requests from per-worker token buckets, so the steady state
+    costs no redis round-trip. Buckets are filled by reserving
+    `chunk_size` requests at once from the shared GCRA limiter. Refills
+    are made in the background when a bucket runs low, and only an empty
+    bucket is refilled synchronously.
+
+    Reserved quota counts against the global limit as soon as it is
+    taken, so the limit is never exceeded. A client can be rejected
+    early by up to `chunk_size` requests per worker, which is the
+    quota sitting unused in the other workers' buckets.
+    """
+
+    def __init__(
+        self, limiter: GCRARateLimiter, chunk_size: int, max_keys: int
+    ) -> None:
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.buckets = LocalCache(max_size=max_keys, ttl=limiter.period)
+
+        self._queue: Queue = Queue()
+        self._pending: set[bytes] = set()
+        self._reconciler: Optional[gevent.Greenlet] = None
+
+    @property
+    def limit(self) -> int:
+        return self.limiter.limit
+
+    def hit(self, key: bytes, cost: int = 1) -> RateLimitResult:
+        bucket = self.buckets.get(key)
+
+        if bucket is None or (bucket.tokens < cost and bucket.retry_at <= monotonic()):
+            bucket = self._reserve(key, max(self.chunk_size, cost))
+
+        if bucket.tokens < cost:
+            return bucket.result(self.limit, allowed=False)
+
+        bucket.tokens -= cost
+
+        if bucket.tokens < self.chunk_size // 2:
+            self._schedule(key)
+
+        return bucket.result(self.limit, allowed=True)
+
+    def _reserve(self, key: bytes, size: int) -> LocalBucket:
+        cost = size
+        result = self.limiter.hit(key, cost=cost)
+
+        if not result.allowed and result.remaining:
+            # Not enough quota left for a whole chunk, take the rest.
+            cost = result.remaining
+            result = self.limiter.hit(key, cost=cost)
+
+        bucket = self.buckets.get(key) or LocalBucket()
+        now = monotonic()
+        bucket.reset_at = now + result.reset_after
+
+        if result.allowed:
+            bucket.tokens += cost
+            bucket.retry_at = 0.0
+        else:
+            # retry_after is for the whole chunk, a single request fits earlier
+            interval = self.limiter.period / self.limiter.limit
+            bucket.retry_at = now + max(result.retry_after - (cost - 1) * interval, 0)
+
+        # Restarts the bucket TTL, quota left unused for a period is dropped.
+        self.buckets.set(key, bucket)
+
+        return bucket
+
+    def _schedule(self, key: bytes) -> None:
+        if key in self._pending:
+            return
+
+        self._pending.add(key)
+        self._queue.put(key)
+
+        if self._reconciler is None or self._reconciler.dead:
+            self._reconciler = gevent.spawn(self._reconcile)
+
+    def _reconcile(self) -> None:
+        while True:
+            key = self._queue.get()
+
+            try:
+                self._reserve(key, self.chunk_size)
+            except RateLimitError:
+                logger.exception("Failed to reserve rate limit quota.")
+            finally:
+                self._pending.discard(key)
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """
+    `limit` requests per `period` seconds for every client identified by
+    `key`: "ip", "sub" of the access token or submitted login from
+    the ip, "login_ip". A request takes `cost` of the limit, so
+    policies with the same name share a quota with different weights.
+    """
+
+    name: str
+    limit: int
+    period: int
+    key: str = "ip"
+    cost: int = 1
+
+    def make_key(self, identity: bytes) -> bytes:
+        return b"rl:" + self.name.encode() + b":" + identity
+
+
+class RateLimitService:
+    def __init__(self, redis: StrictRedis, default_policy: RateLimitPolicy) -> None:
+        self.redis = redis
+        self.default_policy = default_policy
+        self.limiters: dict[
+            tuple[str, int, int], Union[GCRARateLimiter, HybridRateLimiter]
+        ] = {}
+
+    def hit(self, policy: RateLimitPolicy, identity: bytes) -> RateLimitResult:
+        return self.get_limiter(policy).hit(policy.make_key(identity), policy.cost)
+
+    def get_limiter(
+        self, policy: RateLimitPolicy
+    ) -> Union[GCRARateLimiter, HybridRateLimiter]:
+        limiter_key = (policy.name, policy.limit, policy.period)
+        limiter = self.limiters.get(limiter_key)
+
+        if limiter is None:
+            limiter = self.limiters[limiter_key] = self._create_limiter(policy)
+
+        return limiter
+
+    @property
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: limiter.buckets.stats
+            for (name, _, _), limiter in self.limiters.items()
+            if isinstance(limiter, HybridRateLimiter)
+        }
+
+    def _create_limiter(
+        self, policy: RateLimitPolicy
+    ) -> Union[GCRARateLimiter, HybridRateLimiter]:
+        limiter = GCRARateLimiter(
+            redis=self.redis, limit=policy.limit, period=policy.period
+        )
+
+        if settings.RATE_LIMIT.MODE == "hybrid":
+            return HybridRateLimiter(
+                limiter=limiter,
+                chunk_size=settings.RATE_LIMIT.CHUNK_SIZE,
+                max_keys=settings.RATE_LIMIT.LOCAL_MAX_KEYS,
+            )
+
+        return limiter
+
+
+rate_limit_service = RateLimitService(
+    redis=redis_conn,
+    default_policy=RateLimitPolicy(
+        name="default",
+        limit=settings.RATE_LIMIT.MAX_CALLS,
+        period=settings.RATE_LIMIT.PERIOD,
+    ),
+)
+
+metrics.register("rate_limit_buckets", lambda: rate_limit_service.stats)
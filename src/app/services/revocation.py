@@ -0,0 +1,185 @@
+import logging
+from time import monotonic, time
+from typing import Optional
+
+import gevent
+from redis.client import StrictRedis
+
+from app.redis import redis_conn
+from app.services.storages import token_storage, get_issued_at, GLOBAL_WATERMARK
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationMirror:
+    """
+    Per-worker copy of revoked access tokens and "not valid before"
+    watermarks of users, fed by the redis channel RedisTokenStorage publishes to.
+
+    Jtis are grouped into buckets by expiry time, so expired tokens are
+    dropped a whole bucket at a time. Answers are only given for access
+    tokens and while the subscription is fresh, otherwise the caller
+    must ask redis directly.
+    """
+
+    def __init__(
+        self,
+        redis: StrictRedis,
+        channel: str,
+        bucket_size: int,
+        max_staleness: float,
+        warmup: float,
+        poll_interval: float,
+        retry_interval: float,
+    ) -> None:
+        self.redis = redis
+        self.channel = channel
+        self.bucket_size = bucket_size
+        self.max_staleness = max_staleness
+        self.warmup = warmup
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+
+        self._buckets: dict[int, set[str]] = {}
+        self._watermarks: dict[str, int] = {}
+        self._subscribed_at: Optional[float] = None
+        self._polled_at: Optional[float] = None
+        self._listener: Optional[gevent.Greenlet] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        """
+        Revocations published before the subscription are unknown, so the
+        mirror becomes authoritative only when all of them have expired.
+        """
+
+        if self._subscribed_at is None or self._polled_at is None:
+            return False
+
+        now = monotonic()
+
+        return (
+            now - self._subscribed_at >= self.warmup
+            and now - self._polled_at <= self.max_staleness
+        )
+
+    def start(self) -> None:
+        if self._listener is None or self._listener.dead:
+            self._listener = gevent.spawn(self._listen)
+
+    def is_revoked(self, jwt_payload: dict) -> Optional[bool]:
+        """Returns None if the mirror can't answer for the token."""
+
+        self.start()
+
+        if not self.is_fresh or jwt_payload["type"] != "access":
+            return None
+
+        self._drop_expired()
+
+        if any(jwt_payload["jti"] in bucket for bucket in self._buckets.values()):
+            return True
+
+        issued_before = max(
+            self._watermarks.get(jwt_payload["sub"], 0),
+            self._watermarks.get(GLOBAL_WATERMARK, 0),
+        )
+
+        return get_issued_at(jwt_payload) < issued_before
+
+    def add(self, jti: str, expires_at: int) -> None:
+        bucket = expires_at // self.bucket_size
+        self._buckets.setdefault(bucket, set()).add(jti)
+
+    def set_watermark(self, subject: str, issued_before: int) -> None:
+        self._watermarks[subject] = max(self._watermarks.get(subject, 0), issued_before)
+
+    def _drop_expired(self) -> None:
+        now = time()
+        current_bucket = int(now) // self.bucket_size
+
+        for bucket in [b for b in self._buckets if b < current_bucket]:
+            del self._buckets[bucket]
+
+        # access tokens issued before such watermarks have expired anyway
+        oldest_watermark = (now - settings.JWT.ACCESS_TOKEN_EXPIRES) * 1000
+
+        for subject in [
+            s for s, value in self._watermarks.items() if value < oldest_watermark
+        ]:
+            del self._watermarks[subject]
+
+    def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+
+            try:
+                pubsub.subscribe(self.channel)
+                self._subscribed_at = monotonic()
+
+                while True:
+                    message = pubsub.get_message(timeout=self.poll_interval)
+                    self._polled_at = monotonic()
+
+                    if message:
+                        self._apply(message["data"])
+            except Exception:
+                logger.exception("Revocation channel subscription failed.")
+                self._subscribed_at = None
+                pubsub.close()
+                gevent.sleep(self.retry_interval)
+
+    def _apply(self, message: str) -> None:
+        kind, subject, value = message.split()
+
+        if kind == "jti":
+            self.add(subject, int(value))
+        elif kind == "nbf":
+            self.set_watermark(subject, int(value))
+
+
+class RevocationService:
+    @staticmethod
+    def is_token_revoked(jwt_payload: dict) -> bool:
+        if settings.REVOCATION_MIRROR.ENABLED:
+            is_revoked = revocation_mirror.is_revoked(jwt_payload)
+
+            if is_revoked is not None:
+                return is_revoked
+
+        return token_storage.validate_access_token(jwt_payload)
+
+    @staticmethod
+    def are_tokens_revoked(jwt_payloads: list[dict]) -> list[bool]:
+        """
+        Checks all the tokens unknown to the mirror in one redis round-trip.
+        Refresh tokens are unknown to the mirror and are also checked
+        against the current refresh token of their user.
+        """
+
+        results: list[Optional[bool]] = [None] * len(jwt_payloads)
+
+        if settings.REVOCATION_MIRROR.ENABLED:
+            results = [
+                revocation_mirror.is_revoked(payload) for payload in jwt_payloads
+            ]
+
+        unknown = [idx for idx, result in enumerate(results) if result is None]
+        checked = token_storage.validate_tokens([jwt_payloads[idx] for idx in unknown])
+
+        for idx, is_revoked in zip(unknown, checked):
+            results[idx] = is_revoked
+
+        return results
+
+
+revocation_mirror = RevocationMirror(
+    redis=redis_conn,
+    channel=settings.REVOCATION_MIRROR.CHANNEL,
+    bucket_size=settings.REVOCATION_MIRROR.BUCKET_SIZE,
+    max_staleness=settings.REVOCATION_MIRROR.MAX_STALENESS,
+    warmup=settings.JWT.ACCESS_TOKEN_EXPIRES,
+    poll_interval=settings.REVOCATION_MIRROR.POLL_INTERVAL,
+    retry_interval=settings.REVOCATION_MIRROR.RETRY_INTERVAL,
+)
@@ -1,9 +1,13 @@
 from abc import ABC, abstractmethod
+from itertools import islice
+from time import time
+from typing import Iterable, Union
 from uuid import UUID
+from zlib import crc32
 
 from redis.client import StrictRedis, Pipeline
 
-from app.redis import redis_conn
+from app.redis import redis_conn, redis_breaker
 from app.settings import settings
 
 
@@ -32,10 +36,96 @@ class AbstractTokenStorage(ABC):  # pragma: no cover
     def set_refresh_token(self, new_refresh_token: str, user_id: int) -> None:
         pass
 
+    @abstractmethod
+    def rotate_refresh_token(
+        self, refresh_token: str, new_refresh_token: str, user_id: int
+    ) -> None:
+        pass
+
+
+GLOBAL_WATERMARK = "global"
+
+
+def get_issued_at(jwt_payload: dict) -> int:
+    """Issue time in milliseconds, the iat claim has seconds precision only."""
+
+    return jwt_payload.get("iat_ms", jwt_payload["iat"] * 1000)
+
+
+class KeysBlocklist:
+    """One key per revoked access token jti, holding the user id."""
+
+    def add(
+        self, pipe: Pipeline, jti: str, expires_at: int, user_id: Union[str, UUID]
+    ) -> None:
+        pipe.set(name=jti, value=str(user_id), ex=max(expires_at - int(time()), 1))
+
+    def exists(self, pipe: Union[StrictRedis, Pipeline], jti: str, expires_at: int):
+        return pipe.exists(jti)
+
+
+class BucketedBlocklist:
+    """
+    Revoked jtis are stored as fields of small hashes: every
+    `bucket_size` seconds of token expiry get `shards` hashes, which
+    expire as a whole when all their tokens have expired. While a hash
+    holds fewer than hash-max-ziplist-entries fields, redis keeps it in
+    the compact ziplist/listpack encoding, so there is no per-jti key,
+    TTL or user id overhead. Tune `shards` to the revocation rate.
+    """
+
+    def __init__(self, bucket_size: int, shards: int) -> None:
+        self.bucket_size = bucket_size
+        self.shards = shards
+
+    def add(
+        self, pipe: Pipeline, jti: str, expires_at: int, user_id: Union[str, UUID]
+    ) -> None:
+        key, field = self._locate(jti, expires_at)
+        bucket_expires_at = (expires_at // self.bucket_size + 1) * self.bucket_size
+
+        pipe.hset(key, field, "")
+        pipe.expireat(key, bucket_expires_at)
+
+    def exists(self, pipe: Union[StrictRedis, Pipeline], jti: str, expires_at: int):
+        return pipe.hexists(*self._locate(jti, expires_at))
+
+    def _locate(self, jti: str, expires_at: int) -> tuple[str, str]:
+        field = jti.replace("-", "")
+        bucket = expires_at // self.bucket_size
+        shard = crc32(field.encode()) % self.shards
+
+        return f"bl:{bucket}:{shard}", field
+
 
 class RedisTokenStorage(AbstractTokenStorage):
+    # Replaces the current refresh token jti if it matches the presented one.
+    # Otherwise the presented token is reused, so the current one is revoked too.
+    ROTATE_REFRESH_TOKEN_SCRIPT = """
+        local current = redis.call("GET", KEYS[1])
+
+        if current and current == ARGV[1] then
+            redis.call("SET", KEYS[1], ARGV[2])
+            return 1
+        end
+
+        redis.call("DEL", KEYS[1])
+        return 0
+    """
+
     def __init__(self):
         self.redis: StrictRedis = redis_conn
+        self.blocklist = (
+            BucketedBlocklist(
+                bucket_size=settings.BLOCKLIST.BUCKET_SIZE,
+                shards=settings.BLOCKLIST.SHARDS,
+            )
+            if settings.BLOCKLIST.LAYOUT == "buckets"
+            else KeysBlocklist()
+        )
+        self._rotate_refresh_token = self.redis.register_script(
+            self.ROTATE_REFRESH_TOKEN_SCRIPT
+        )
 
     def validate_refresh_token(self, refresh_token_jti: str, user_id: UUID) -> None:
         current_refresh_token_jti = self._execute(self.redis.get, name=str(user_id))
@@ -49,8 +139,58 @@ class RedisTokenStorage(AbstractTokenStorage):
 
         return
 
-    def validate_access_token(self, access_token_jti: str) -> bool:
-        return bool(self._execute(self.redis.exists, access_token_jti))
+    def validate_access_token(self, access_token: dict) -> bool:
+        return self.validate_access_tokens([access_token])[0]
+
+    def validate_access_tokens(self, access_tokens: list[dict]) -> list[bool]:
+        """
+        Checks the decoded tokens against the blocklist and the
+        "not valid before" watermarks of their users in a single round-trip.
+        """
+
+        return self._validate_tokens(access_tokens, check_refresh=False)
+
+    def validate_tokens(self, tokens: list[dict]) -> list[bool]:
+        """
+        Same as `validate_access_tokens`, but refresh tokens are also
+        revoked unless they are the current refresh token of their user.
+        """
+
+        return self._validate_tokens(tokens, check_refresh=True)
+
+    def _validate_tokens(self, tokens: list[dict], check_refresh: bool) -> list[bool]:
+        def is_current_checked(token: dict) -> bool:
+            return check_refresh and token["type"] == "refresh"
+
+        def callback(pipe: Pipeline) -> None:
+            for token in tokens:
+                self.blocklist.exists(pipe, token["jti"], token["exp"])
+                pipe.mget(
+                    self._watermark_key(token["sub"]),
+                    self._watermark_key(GLOBAL_WATERMARK),
+                )
+
+                if is_current_checked(token):
+                    pipe.get(token["sub"])
+
+        if not tokens:
+            return []
+
+        results = iter(self._execute(self._pipeline, callback))
+        revoked = []
+
+        for token in tokens:
+            is_blocked, watermarks = next(results), next(results)
+            issued_before = max(int(watermark or 0) for watermark in watermarks)
+            is_revoked = bool(is_blocked) or get_issued_at(token) < issued_before
+
+            if is_current_checked(token):
+                # Rotated away or dropped by logout
+                is_revoked = next(results) != token["jti"] or is_revoked
+
+            revoked.append(is_revoked)
+
+        return revoked
 
     def invalidate_current_refresh_token(self, user_id: UUID) -> None:
         self._execute(self.redis.delete, str(user_id))
@@ -58,21 +198,89 @@ class RedisTokenStorage(AbstractTokenStorage):
     def set_refresh_token(self, token_jti: str, user_id: UUID) -> None:
         self._execute(self.redis.set, name=str(user_id), value=token_jti)
 
-    def invalidate_token_pair(self, access_token_jti: str, user_id: UUID) -> None:
+    def rotate_refresh_token(
+        self, refresh_token_jti: str, new_refresh_token_jti: str, user_id: UUID
+    ) -> None:
+        """
+        Validates and rotates the refresh token atomically in a single
+        round-trip. The script is sent once, then called by its SHA.
+        """
+
+        is_rotated = self._execute(
+            self._rotate_refresh_token,
+            keys=[str(user_id)],
+            args=[refresh_token_jti, new_refresh_token_jti],
+            client=self.redis,
+        )
+
+        if not is_rotated:
+            raise InvalidTokenError
+
+    def invalidate_token_pair(
+        self, access_token_jti: str, expires_at: int, user_id: UUID
+    ) -> None:
         def callback(pipe: Pipeline) -> None:
-            pipe.set(
-                name=access_token_jti,
-                value=str(user_id),
-                ex=settings.JWT.ACCESS_TOKEN_EXPIRES,
-            )
+            self.blocklist.add(pipe, access_token_jti, expires_at, user_id)
             pipe.delete(str(user_id))
+            pipe.publish(
+                settings.REVOCATION_MIRROR.CHANNEL,
+                f"jti {access_token_jti} {expires_at}",
+            )
 
         self._execute(self.redis.transaction, func=callback)
 
+    def set_watermark(self, user_ids: Iterable[UUID], issued_before: int) -> None:
+        """
+        Revokes every token of the users issued before `issued_before` ms
+        without enumerating them. The refresh tokens are dropped as well.
+        Users are written in transactions of WATERMARK_BATCH_SIZE, so any
+        number of them can be streamed in.
+        """
+
+        user_ids = iter(user_ids)
+
+        while True:
+            batch = list(islice(user_ids, settings.BLOCKLIST.WATERMARK_BATCH_SIZE))
+
+            if not batch:
+                break
+
+            def callback(pipe: Pipeline) -> None:
+                for user_id in batch:
+                    self._add_watermark(pipe, str(user_id), issued_before)
+                    pipe.delete(str(user_id))
+
+            self._execute(self.redis.transaction, func=callback)
+
+    def set_global_watermark(self, issued_before: int) -> None:
+        def callback(pipe: Pipeline) -> None:
+            self._add_watermark(pipe, GLOBAL_WATERMARK, issued_before)
+
+        self._execute(self.redis.transaction, func=callback)
+
+    def _add_watermark(self, pipe: Pipeline, subject: str, issued_before: int) -> None:
+        pipe.set(
+            self._watermark_key(subject),
+            issued_before,
+            ex=settings.JWT.REFRESH_TOKEN_EXPIRES,
+        )
+        pipe.publish(
+            settings.REVOCATION_MIRROR.CHANNEL, f"nbf {subject} {issued_before}"
+        )
+
+    @staticmethod
+    def _watermark_key(subject: str) -> str:
+        return f"nbf:{subject}"
+
+    def _pipeline(self, callback) -> list:
+        with self.redis.pipeline(transaction=False) as pipe:
+            callback(pipe)
+            return pipe.execute()
+
     @staticmethod
     def _execute(method, *args, **kwargs):
         try:
-            return method(*args, **kwargs)
+            return redis_breaker.call(method, *args, **kwargs)
         except Exception as err:
             raise TokenStorageError from err
 
@@ -50,6 +50,14 @@ class RedisSettings(BaseDSNSettings):
     PORT: int = 6379
     PROTOCOL: str = "redis"
     DSN: RedisDsn = None
+    MAX_CONNECTIONS: int = 50
+    POOL_TIMEOUT: float = 1.0
+    SOCKET_TIMEOUT: float = 1.0
+    SOCKET_CONNECT_TIMEOUT: float = 1.0
+    HEALTH_CHECK_INTERVAL: int = 30
+    RETRY_ON_TIMEOUT: bool = True
+    BREAKER_FAILURE_THRESHOLD: int = 5
+    BREAKER_RESET_TIMEOUT: float = 5.0
 
     class Config:
         env_prefix = "REDIS_"
@@ -57,7 +65,14 @@ class RedisSettings(BaseDSNSettings):
 
 class RateLimitSettings(BaseSettings):
     MAX_CALLS: int = 20
-    PERIOD: int = 59
+    PERIOD: int = 60
+    MODE: str = "redis"  # or "hybrid"
+    CHUNK_SIZE: int = 5
+    LOCAL_MAX_KEYS: int = 10000
+    PASSWORD_CHECK_COST: int = 5
+    LOGIN_MAX_CALLS: int = 5
+    LOGIN_PERIOD: int = 60
+    INTERNAL_MAX_CALLS: int = 6000
 
     class Config:
         env_prefix = "RATE_LIMIT_"
@@ -76,11 +91,43 @@ class JWTSettings(BaseSettings):
     SECRET_KEY: str = "super-secret"
     ACCESS_TOKEN_EXPIRES: int = 60
     REFRESH_TOKEN_EXPIRES: int = 60 * 60 * 24 * 30  # 30 days
+    KEYS_DIR: str = ""  # RS256/EdDSA private keys, HS256 with SECRET_KEY if empty
+    SIGNING_KEY_ID: str = ""
+    JWKS_MAX_AGE: int = 60 * 60
 
     class Config:
         env_prefix = "JWT_"
 
 
+class BlocklistSettings(BaseSettings):
+    LAYOUT: str = "keys"  # or "buckets"
+    BUCKET_SIZE: int = 60
+    SHARDS: int = 64
+    WATERMARK_BATCH_SIZE: int = 1000  # users per transaction of a mass logout
+
+    class Config:
+        env_prefix = "BLOCKLIST_"
+
+
+class IntrospectionSettings(BaseSettings):
+    MAX_TOKENS: int = 100
+
+    class Config:
+        env_prefix = "INTROSPECTION_"
+
+
+class RevocationMirrorSettings(BaseSettings):
+    ENABLED: bool = False
+    CHANNEL: str = "revoked-access-tokens"
+    BUCKET_SIZE: int = 10
+    MAX_STALENESS: float = 2.0
+    POLL_INTERVAL: float = 0.5
+    RETRY_INTERVAL: float = 1.0
+
+    class Config:
+        env_prefix = "REVOCATION_MIRROR_"
+
+
 class OauthSettings(BaseSettings):
     class GoogleSettings(BaseSettings):
         CLIENT_ID: str = ""
@@ -114,8 +161,42 @@ class SecuritySettings(BaseSettings):
         env_prefix = "SECURITY_"
 
 
+class PasswordHashingSettings(BaseSettings):
+    MAX_WORKERS: int = 4  # 0 hashes inline, blocking the worker
+    MAX_QUEUE: int = 64
+    # see `python manage.py calibrate-hash`
+    METHOD: str = "pbkdf2:sha256:260000"
+    SALT_LENGTH: int = 16
+
+    class Config:
+        env_prefix = "PASSWORD_HASHING_"
+
+
+class AuthHistorySettings(BaseSettings):
+    ASYNC: bool = False
+    QUEUE_SIZE: int = 10000
+    BATCH_SIZE: int = 500
+    FLUSH_INTERVAL: float = 0.5  # seconds of history lost if a worker dies
+    PREMAKE_MONTHS: int = 3
+    RETENTION_MONTHS: int = 12  # 0 keeps all partitions
+    DROP_EXPIRED: bool = False  # detached partitions are kept for archiving
+
+    class Config:
+        env_prefix = "AUTH_HISTORY_"
+
+
+class DevicesSettings(BaseSettings):
+    CACHE_SIZE: int = 10000
+    WARM_UP_SIZE: int = 1000  # most frequent user agents parsed at startup
+    WARM_UP_DAYS: int = 7  # of the login history they are counted in
+
+    class Config:
+        env_prefix = "DEVICES_"
+
+
 class PaginationSettings(BaseSettings):
     PAGE_LIMIT: int = 5
+    MAX_PAGE_LIMIT: int = 100
 
     class Config:
         env_prefix = "PAGINATION_"
@@ -123,11 +204,28 @@ class PaginationSettings(BaseSettings):
 
 class CacheSettings(BaseSettings):
     TTL: int = 60 * 60 * 3
+    TWO_TIER: bool = True
+    L1_MAX_SIZE: int = 1000
+    L1_TTL: float = 5.0
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    LOCK_TIMEOUT: float = 10.0
+    LOCK_POLL_INTERVAL: float = 0.05
+    XFETCH_BETA: float = 1.0
+    SERIALIZER: str = "json"  # or "msgpack", "pickle"
+    COMPRESS_THRESHOLD: int = 1024  # bytes, 0 disables compression
 
     class Config:
         env_prefix = "CACHE_"
 
 
+class IdentityCacheSettings(BaseSettings):
+    MAX_SIZE: int = 10000
+    TTL: int = 30
+
+    class Config:
+        env_prefix = "IDENTITY_CACHE_"
+
+
 class APMSettings(BaseSettings):
     ENABLED: bool
     SERVER_URL: str
@@ -143,6 +241,9 @@ class CommonSettings(BaseSettings):
 
     DEBUG: bool = False
     TESTING: bool = False
+    # Stage durations tell logins with and without a password check apart,
+    # so they are only sent when enabled, e.g. behind an internal proxy.
+    SERVER_TIMING: bool = False
     LOG_LEVEL: str = "INFO"
     SHARED_DIR: str = "/code/shared"
     DIR_LOGS: Path = Path(SHARED_DIR, "/code/shared/logs")
@@ -151,9 +252,16 @@ class CommonSettings(BaseSettings):
     REDIS: RedisSettings = RedisSettings()
     DB: DatabaseSettings = DatabaseSettings()
     JWT: JWTSettings = JWTSettings()
+    BLOCKLIST: BlocklistSettings = BlocklistSettings()
+    REVOCATION_MIRROR: RevocationMirrorSettings = RevocationMirrorSettings()
+    INTROSPECTION: IntrospectionSettings = IntrospectionSettings()
     RATE_LIMIT: RateLimitSettings = RateLimitSettings()
     OAUTH: OauthSettings = OauthSettings()
     SECURITY: SecuritySettings = SecuritySettings()
+    PASSWORD_HASHING: PasswordHashingSettings = PasswordHashingSettings()
     PAGINATION: PaginationSettings = PaginationSettings()
+    AUTH_HISTORY: AuthHistorySettings = AuthHistorySettings()
+    DEVICES: DevicesSettings = DevicesSettings()
     APM: APMSettings = APMSettings()
     CACHE: CacheSettings = CacheSettings()
+    IDENTITY_CACHE: IdentityCacheSettings = IdentityCacheSettings()
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
+
+from flask import has_request_context, request
+
+
+@contextmanager
+def server_timing(name: str) -> Iterator[None]:
+    """Records the duration of a request stage for the Server-Timing header."""
+
+    started = perf_counter()
+
+    try:
+        yield
+    finally:
+        # Kept on the request, `g` outlives it when an app context
+        # has been pushed beforehand.
+        if has_request_context():
+            if not hasattr(request, "server_timing"):
+                request.server_timing = {}
+
+            timings = request.server_timing
+            timings[name] = timings.get(name, 0.0) + perf_counter() - started
+
+
+def get_server_timing_header() -> str:
+    return ", ".join(
+        f"{name};dur={elapsed * 1000:.1f}"
+        for name, elapsed in getattr(request, "server_timing", {}).items()
+    )
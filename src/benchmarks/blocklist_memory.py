@@ -0,0 +1,67 @@
+"""
+Redis memory used by the access token blocklist layouts.
+
+Writes the revocations into an empty redis database, which
+is flushed afterwards, and reports the used_memory growth.
+Token expiry is spread evenly over `spread` seconds, a day of logouts
+by default.
+
+    python -m benchmarks.blocklist_memory --revocations 1000000 --db 15
+"""
+
+from time import time
+from uuid import uuid4
+
+import typer
+from redis import StrictRedis
+
+from app.services.storages import KeysBlocklist, BucketedBlocklist
+from app.settings import settings
+
+BATCH_SIZE = 10000
+
+
+def measure(redis: StrictRedis, blocklist, revocations: int, spread: int) -> int:
+    redis.flushdb()
+    used_memory = redis.info("memory")["used_memory"]
+    now = int(time())
+
+    for offset in range(0, revocations, BATCH_SIZE):
+        with redis.pipeline(transaction=False) as pipe:
+            for idx in range(offset, min(offset + BATCH_SIZE, revocations)):
+                expires_at = now + idx * spread // revocations
+                blocklist.add(pipe, str(uuid4()), expires_at, uuid4())
+
+            pipe.execute()
+
+    grown = redis.info("memory")["used_memory"] - used_memory
+    redis.flushdb()
+
+    return grown
+
+
+def main(
+    revocations: int = 1_000_000, db: int = 15, shards: int = 64, spread: int = 86400
+) -> None:
+    redis = StrictRedis(host=settings.REDIS.HOST, port=settings.REDIS.PORT, db=db)
+
+    if redis.dbsize():
+        raise typer.BadParameter(f"Redis db {db} is not empty.")
+
+    layouts = {
+        "keys": KeysBlocklist(),
+        "buckets": BucketedBlocklist(
+            bucket_size=settings.BLOCKLIST.BUCKET_SIZE, shards=shards
+        ),
+    }
+
+    for name, blocklist in layouts.items():
+        grown = measure(redis, blocklist, revocations, spread)
+        typer.echo(
+            f"{name:>8}: {grown / 2 ** 20:.1f} MiB, "
+            f"{grown / revocations:.1f} bytes per revocation"
+        )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,56 @@
+"""
+Cache hit latency: Redis only (L2) vs the two-tier cache (L1 + L2).
+
+    python -m benchmarks.cache --reads 10000 --keys 100
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from statistics import median, quantiles
+from time import perf_counter
+
+import gevent
+import typer
+from flask_caching.backends.rediscache import RedisCache
+from redis import from_url
+
+from app.cache import TwoTierCache
+from app.settings import settings
+
+
+def run(name: str, backend: RedisCache, reads: int, keys: int) -> None:
+    backend.set_many({f"bench:{idx}": {"idx": idx} for idx in range(keys)})
+    latencies = []
+
+    for idx in range(reads):
+        started = perf_counter()
+        backend.get(f"bench:{idx % keys}")
+        latencies.append((perf_counter() - started) * 1_000_000)
+
+    backend.delete_many(*(f"bench:{idx}" for idx in range(keys)))
+
+    typer.echo(
+        f"{name:>8}: median {median(latencies):.1f}us, "
+        f"p99 {quantiles(latencies, n=100)[-1]:.1f}us"
+    )
+
+
+def main(reads: int = 10000, keys: int = 100) -> None:
+    run("l2", RedisCache(host=from_url(settings.REDIS.DSN)), reads, keys)
+
+    two_tier = TwoTierCache(
+        host=from_url(settings.REDIS.DSN),
+        l1_max_size=settings.CACHE.L1_MAX_SIZE,
+        l1_ttl=settings.CACHE.L1_TTL,
+        channel=settings.CACHE.INVALIDATION_CHANNEL,
+    )
+    two_tier.start()
+    gevent.sleep(0.1)
+
+    run("l1 + l2", two_tier, reads, keys)
+
+
+if __name__ == "__main__":
+    typer.run(main)
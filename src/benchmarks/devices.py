@@ -0,0 +1,50 @@
+"""
+Device classification of login user agents: user_agents.parse on every
+login vs the memoized classifier.
+
+    python -m benchmarks.devices --logins 10000
+"""
+
+from random import choices
+from time import perf_counter
+
+import typer
+from user_agents import parse
+
+from app.services.devices import DeviceClassifier
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/15.0 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:93.0) Gecko/20100101 Firefox/93.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 11; SM-G991B) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/94.0.4606.71 Mobile Safari/537.36",
+    "Mozilla/5.0 (iPad; CPU OS 15_0 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1",
+    "python-requests/2.26.0",
+]
+
+
+def main(logins: int = 10000) -> None:
+    # A few popular agents make up most of the logins.
+    user_agents = choices(USER_AGENTS, weights=[40, 20, 10, 15, 10, 4, 1], k=logins)
+    classifier = DeviceClassifier(max_size=1000)
+
+    for name, classify in (("parse", parse), ("cached", classifier.classify)):
+        started = perf_counter()
+
+        for user_agent in user_agents:
+            classify(user_agent)
+
+        elapsed = perf_counter() - started
+        typer.echo(f"{name:>6}: {elapsed / logins * 1_000_000:.1f}us per login")
+
+    typer.echo(f"cache: {classifier.storage.stats}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
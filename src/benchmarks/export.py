@@ -0,0 +1,80 @@
+"""
+History export throughput and peak memory per format and compression.
+The history table is filled up to --rows rows of a benchmark user first.
+
+    python -m benchmarks.export --rows 10000000
+"""
+
+import resource
+from itertools import product
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import typer
+from sqlalchemy import text
+
+from app.database import db, session_scope
+from app.datastore import user_datastore
+from app.main import app  # noqa: F401, initializes the database
+from app.models import AuthHistory, User
+from app.services.exports import Exporter
+
+LOGIN = "export-benchmark"
+
+
+def seed(rows: int) -> None:
+    missing = rows - AuthHistory.query.count()
+
+    if missing <= 0:
+        return
+
+    user = User.query.filter_by(login=LOGIN).one_or_none()
+
+    if user is None:
+        with session_scope():
+            user = user_datastore.create_user(login=LOGIN, password=LOGIN)
+
+    typer.echo(f"seeding {missing} history rows")
+
+    with session_scope() as session:
+        session.execute(
+            text(
+                f"""
+                INSERT INTO {AuthHistory.__table__.fullname}
+                    (id, user_id, timestamp, user_agent, ip_addr, device, platform)
+                SELECT
+                    gen_random_uuid(), :user_id, now() - n * interval '1 second',
+                    'Mozilla/5.0 (X11; Linux x86_64; rv:93.0) Firefox/93.0',
+                    '127.0.0.1', 'Other', 'pc'
+                FROM generate_series(1, :rows) AS n
+                """
+            ),
+            {"user_id": user.id, "rows": missing},
+        )
+
+
+def main(rows: int = 1_000_000, batch_size: int = 10000) -> None:
+    seed(rows)
+    db.session.close()
+    exporter = Exporter(batch_size=batch_size)
+
+    with TemporaryDirectory() as directory:
+        for file_format, compression in product(
+            ("ndjson", "csv"), ("none", "gzip", "zstd")
+        ):
+            path = Path(directory, f"history.{file_format}")
+            started = perf_counter()
+            exported = exporter.export("history", path, file_format, compression)
+            elapsed = perf_counter() - started
+            # ru_maxrss is in kilobytes on linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+            typer.echo(
+                f"{file_format:>6} {compression:>4}: {exported / elapsed:,.0f} rows/s, "
+                f"{path.stat().st_size / 2 ** 20:,.0f}MiB, peak rss {peak:,.0f}MiB"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,66 @@
+"""
+Latency of a cheap request during a login storm: password checks inline
+vs in the hashing thread pool. The probe greenlet stands for any
+non-login request, its extra delay is the time the hub was stalled.
+
+    python -m benchmarks.password_hashing --logins 200 --concurrency 50
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from statistics import median, quantiles
+from time import perf_counter
+
+import gevent
+import typer
+from gevent.pool import Pool
+
+from app.passwords import PasswordHasher
+from app.settings import settings
+
+PROBE_INTERVAL = 0.005
+
+
+def probe(latencies: list[float]) -> None:
+    while True:
+        started = perf_counter()
+        gevent.sleep(PROBE_INTERVAL)
+        latencies.append((perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+def run(name: str, hasher: PasswordHasher, logins: int, concurrency: int) -> None:
+    pwhash = hasher.hash("password")
+    latencies: list[float] = []
+    prober = gevent.spawn(probe, latencies)
+    gevent.sleep(PROBE_INTERVAL * 2)
+
+    started = perf_counter()
+    Pool(concurrency).map(lambda _: hasher.check(pwhash, "password"), range(logins))
+    elapsed = perf_counter() - started
+
+    prober.kill()
+
+    typer.echo(
+        f"{name:>8}: {logins / elapsed:.0f} logins/s, "
+        f"probe delay median {median(latencies):.2f}ms, "
+        f"p99 {quantiles(latencies, n=100)[-1]:.2f}ms, "
+        f"max {max(latencies):.2f}ms"
+    )
+
+
+def main(logins: int = 200, concurrency: int = 50) -> None:
+    run("inline", PasswordHasher(max_workers=0, max_queue=0), logins, concurrency)
+    run(
+        "pool",
+        PasswordHasher(
+            max_workers=settings.PASSWORD_HASHING.MAX_WORKERS or 4, max_queue=logins
+        ),
+        logins,
+        concurrency,
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
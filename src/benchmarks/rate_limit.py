@@ -0,0 +1,101 @@
+"""
+Rate limiting: fixed window MULTI/EXEC INCR + EXPIRE vs the GCRA script
+vs the GCRA script behind per-worker token buckets (RATE_LIMIT_MODE=hybrid).
+Reports throughput and redis memory used by the keys of `clients` clients.
+
+    python -m benchmarks.rate_limit --requests 10000 --clients 1000 --concurrency 100
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from datetime import datetime
+from ipaddress import ip_address
+from time import perf_counter
+
+import typer
+from gevent.pool import Pool
+from redis.client import Pipeline
+
+from app.redis import redis_conn
+from app.services.rate_limit import (
+    GCRARateLimiter,
+    HybridRateLimiter,
+    RateLimitPolicy,
+)
+from app.settings import settings
+
+policy = RateLimitPolicy(
+    name="bench",
+    limit=settings.RATE_LIMIT.MAX_CALLS,
+    period=settings.RATE_LIMIT.PERIOD,
+)
+gcra_limiter = GCRARateLimiter(
+    redis=redis_conn,
+    limit=policy.limit,
+    period=policy.period,
+)
+hybrid_limiter = HybridRateLimiter(
+    limiter=gcra_limiter,
+    chunk_size=settings.RATE_LIMIT.CHUNK_SIZE,
+    max_keys=settings.RATE_LIMIT.LOCAL_MAX_KEYS,
+)
+
+
+def client_addr(idx: int) -> str:
+    return f"10.{idx >> 16 & 255}.{idx >> 8 & 255}.{idx & 255}"
+
+
+def legacy_key(idx: int) -> str:
+    dt = datetime.now().replace(second=0, microsecond=0)
+    return f"bench:{client_addr(idx)}:{dt}"
+
+
+def legacy_hit(idx: int) -> None:
+    # The middleware before the script.
+    key = legacy_key(idx)
+
+    def callback(pipe: Pipeline) -> None:
+        pipe.incr(key, 1)
+        pipe.expire(key, 59)
+
+    redis_conn.transaction(callback)
+
+
+def script_key(idx: int) -> bytes:
+    return policy.make_key(ip_address(client_addr(idx)).packed)
+
+
+def script_hit(idx: int) -> None:
+    gcra_limiter.hit(script_key(idx))
+
+
+def hybrid_hit(idx: int) -> None:
+    hybrid_limiter.hit(script_key(idx))
+
+
+def run(name: str, hit, key, requests: int, clients: int, concurrency: int) -> None:
+    memory_before = redis_conn.info("memory")["used_memory"]
+
+    started = perf_counter()
+    Pool(concurrency).map(hit, (idx % clients for idx in range(requests)))
+    elapsed = perf_counter() - started
+
+    memory = redis_conn.info("memory")["used_memory"] - memory_before
+    redis_conn.delete(*{key(idx) for idx in range(clients)})
+
+    typer.echo(
+        f"{name:>8}: {elapsed:.3f}s, {requests / elapsed:.0f} requests/s, "
+        f"~{memory / clients:.0f} bytes per client"
+    )
+
+
+def main(requests: int = 10000, clients: int = 1000, concurrency: int = 100) -> None:
+    run("legacy", legacy_hit, legacy_key, requests, clients, concurrency)
+    run("script", script_hit, script_key, requests, clients, concurrency)
+    run("hybrid", hybrid_hit, script_key, requests, clients, concurrency)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,71 @@
+"""
+Refresh token rotation: GET + SET/DEL from the app vs a single EVALSHA.
+Counts the redis round-trips and wall time under gevent concurrency.
+
+    python -m benchmarks.refresh_rotation --users 1000 --concurrency 100
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from time import perf_counter
+from uuid import uuid4
+
+import typer
+from gevent.pool import Pool
+from redis.connection import Connection
+
+from app.services.storages import token_storage, InvalidTokenError
+
+round_trips = 0
+send_packed_command = Connection.send_packed_command
+
+
+def counted_send_packed_command(self, *args, **kwargs):
+    global round_trips
+    round_trips += 1
+    return send_packed_command(self, *args, **kwargs)
+
+
+Connection.send_packed_command = counted_send_packed_command
+
+
+def legacy_rotation(user_id: str, jti: str) -> None:
+    # The flow before the script: validate, then set or delete.
+    if token_storage.redis.get(user_id) != jti:
+        token_storage.redis.delete(user_id)
+        raise InvalidTokenError
+
+    token_storage.redis.set(user_id, str(uuid4()))
+
+
+def script_rotation(user_id: str, jti: str) -> None:
+    token_storage.rotate_refresh_token(jti, str(uuid4()), user_id)
+
+
+def run(name: str, rotate, users: int, concurrency: int) -> None:
+    global round_trips
+
+    jtis = {f"bench:{uuid4()}": str(uuid4()) for _ in range(users)}
+    token_storage.redis.mset(jtis)
+    round_trips = 0
+
+    started = perf_counter()
+    Pool(concurrency).map(lambda item: rotate(*item), jtis.items())
+    elapsed = perf_counter() - started
+
+    token_storage.redis.delete(*jtis)
+    typer.echo(
+        f"{name:>8}: {elapsed:.3f}s, {users / elapsed:.0f} rotations/s, "
+        f"{round_trips / users:.1f} round-trips per rotation"
+    )
+
+
+def main(users: int = 1000, concurrency: int = 100) -> None:
+    run("legacy", legacy_rotation, users, concurrency)
+    run("script", script_rotation, users, concurrency)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,67 @@
+"""
+Serializers over the payloads the app caches: dumps + loads time and size.
+
+    python -m benchmarks.serializers --rounds 10000
+"""
+
+from time import perf_counter
+from uuid import uuid4
+
+import typer
+
+from app.serializers import get_serializer
+
+ENTRY = {"delta": 0.0123, "expires_at": 1634567890.123}
+
+PAYLOADS = {
+    "roles": ["guest", "staff", "superuser"],
+    "user info": {
+        "id": str(uuid4()),
+        "login": "test",
+        "email": "test@example.com",
+        "roles": ["guest", "staff"],
+        "active": True,
+    },
+    "has role": dict(ENTRY, value={"has_role": True}),
+    "history page": dict(
+        ENTRY,
+        value=[
+            {
+                "id": str(uuid4()),
+                "timestamp": "2021-10-18T12:00:00",
+                "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/94.0.4606.81 Safari/537.36",
+                "ip_addr": "127.0.0.1",
+                "device": "Other",
+            }
+            for _ in range(50)
+        ],
+    ),
+}
+
+SERIALIZERS = {
+    "pickle": get_serializer("pickle"),
+    "json": get_serializer("json"),
+    "msgpack": get_serializer("msgpack"),
+    "json+zstd": get_serializer("json", compress_threshold=1024),
+    "msgpack+zstd": get_serializer("msgpack", compress_threshold=1024),
+}
+
+
+def main(rounds: int = 10000) -> None:
+    for payload_name, payload in PAYLOADS.items():
+        typer.echo(payload_name)
+
+        for name, serializer in SERIALIZERS.items():
+            started = perf_counter()
+
+            for _ in range(rounds):
+                data = serializer.dumps(payload)
+                serializer.loads(data)
+
+            elapsed = (perf_counter() - started) / rounds * 1_000_000
+            typer.echo(f"{name:>14}: {elapsed:6.1f}us, {len(data):6} bytes")
+
+
+if __name__ == "__main__":
+    typer.run(main)
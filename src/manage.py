@@ -2,6 +2,7 @@ from gevent import monkey
 
 monkey.patch_all()
 
+from pathlib import Path
 from typing import Optional
 
 import typer
@@ -13,9 +14,17 @@ from app.database import session_scope
 from app.datastore import user_datastore
 from app.main import app
 from app.models import DefaultRoleEnum
+from app.passwords import calibrate_iterations
+from app.services.accounts import AccountsService
+from app.services.devices import device_classifier
+from app.services.exports import Exporter
+from app.services.imports import UserImporter, read_users
+from app.services.partitions import auth_history_partitions
 from app.settings import settings
 
 typer_app = typer.Typer()
+export_app = typer.Typer(help="Stream tables to ndjson or csv files.")
+typer_app.add_typer(export_app, name="export")
 
 
 @typer_app.command()
@@ -25,6 +34,10 @@ def shell():
 
 @typer_app.command()
 def runserver():
+    device_classifier.warm_up(
+        settings.DEVICES.WARM_UP_SIZE, settings.DEVICES.WARM_UP_DAYS
+    )
+
     http_server = WSGIServer(
         (settings.WSGI.HOST, settings.WSGI.PORT), app, spawn=settings.WSGI.workers
     )
@@ -52,5 +65,104 @@ def create_superuser(
         )
 
 
+@typer_app.command()
+def revoke_tokens() -> None:
+    """Revoke every access and refresh token issued so far."""
+
+    AccountsService.revoke_all_tokens()
+
+
+@typer_app.command()
+def calibrate_hash(
+    target_ms: float = typer.Option(250.0),
+    algorithms: list[str] = typer.Option(["sha256", "sha512"]),
+    rounds: int = typer.Option(5),
+) -> None:
+    """
+    Find PBKDF2 iterations verifying a password in about `target_ms` here.
+    Stored hashes are upgraded on the next login after METHOD changes.
+    """
+
+    for algorithm in algorithms:
+        iterations, elapsed = calibrate_iterations(algorithm, target_ms / 1000, rounds)
+        typer.echo(
+            f"PASSWORD_HASHING_METHOD=pbkdf2:{algorithm}:{iterations}"
+            f"  # verify {elapsed * 1000:.0f}ms"
+        )
+
+
+@typer_app.command()
+def import_users(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False),
+    file_format: Optional[str] = typer.Option(None, "--format"),
+    batch_size: int = typer.Option(10000),
+    workers: Optional[int] = typer.Option(None),
+    skip: int = typer.Option(0),
+) -> None:
+    """
+    Import users with the guest role from csv or ndjson with login, email
+    and password or password_hash fields. Already existing users and records
+    without a login or a password are skipped, pass the last reported
+    processed count as --skip to resume faster.
+    """
+
+    importer = UserImporter(batch_size=batch_size, workers=workers)
+
+    with path.open() as file:
+        records = read_users(file, file_format or path.suffix.lstrip("."))
+
+        for processed, imported, invalid in importer.run(records, skip=skip):
+            typer.echo(f"processed {processed}, imported {imported}, invalid {invalid}")
+
+
+@typer_app.command()
+def partitions(
+    drop: bool = typer.Option(settings.AUTH_HISTORY.DROP_EXPIRED),
+) -> None:
+    """
+    Create auth history partitions for the months ahead and detach, or drop,
+    the ones past retention. Meant to be run daily.
+    """
+
+    for name in auth_history_partitions.create():
+        typer.echo(f"created {name}")
+
+    for name in auth_history_partitions.expire(drop=drop):
+        typer.echo(f"{'dropped' if drop else 'detached'} {name}")
+
+
+def export(
+    name: str, output: Path, file_format: str, compression: str, batch_size: int
+) -> None:
+    exported = Exporter(batch_size=batch_size).export(
+        name, output, file_format, compression
+    )
+    typer.echo(f"exported {exported} rows to {output}")
+
+
+@export_app.command("users")
+def export_users(
+    output: Path = typer.Argument(..., dir_okay=False),
+    file_format: str = typer.Option("ndjson", "--format"),  # or "csv"
+    compression: str = typer.Option("none"),  # or "gzip", "zstd"
+    batch_size: int = typer.Option(10000),
+) -> None:
+    """Users with names of their roles."""
+
+    export("users", output, file_format, compression, batch_size)
+
+
+@export_app.command("history")
+def export_history(
+    output: Path = typer.Argument(..., dir_okay=False),
+    file_format: str = typer.Option("ndjson", "--format"),  # or "csv"
+    compression: str = typer.Option("none"),  # or "gzip", "zstd"
+    batch_size: int = typer.Option(10000),
+) -> None:
+    """Login history of all users."""
+
+    export("history", output, file_format, compression, batch_size)
+
+
 if __name__ == "__main__":
     typer_app()
@@ -0,0 +1,36 @@
+"""auth history keyset index
+
+Index for the newest first keyset pagination of the user history.
+Created on the partitioned table, so it cascades to every partition.
+
+Revision ID: custom2
+Revises: custom1
+Create Date: 2022-01-24 20:12:41.184213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "custom2"
+down_revision = "custom1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "auth_history_user_id_timestamp_id_idx",
+        "auth_history",
+        ["user_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+        schema="content",
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "auth_history_user_id_timestamp_id_idx",
+        table_name="auth_history",
+        schema="content",
+    )
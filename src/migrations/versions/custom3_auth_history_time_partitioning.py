@@ -0,0 +1,200 @@
+"""auth history time partitioning
+
+Repartitions auth_history by RANGE (timestamp) with a partition per month
+instead of LIST (platform). Rows out of the monthly ranges go to the
+default partition. Partitions are created ahead and expired afterwards
+by `python manage.py partitions`.
+
+The new table takes writes as soon as the schema is switched, existing
+rows are moved partition by partition in id ordered batches of
+MOVE_BATCH_SIZE, each in its own transaction, so the table is never
+locked for the whole copy.
+
+Revision ID: custom3
+Revises: custom2
+Create Date: 2022-01-27 21:03:17.512930
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "custom3"
+down_revision = "custom2"
+branch_labels = None
+depends_on = None
+
+MOVE_BATCH_SIZE = 10000
+PREMAKE_MONTHS = 3
+PLATFORMS = ("pc", "mobile", "tablet")
+COLUMNS = "id, user_id, user_agent, ip_addr, device, created_on, updated_on, platform"
+
+
+def add_months(month: date, months: int) -> date:
+    year, month_idx = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_idx + 1, 1)
+
+
+def create_month_partition(month: date) -> None:
+    op.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS content."auth_history_y{month:%Y}m{month:%m}"
+        PARTITION OF content."auth_history"
+        FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}');
+        """
+    )
+
+
+def move_partition(partition: str) -> None:
+    """
+    Moves the rows of a legacy partition in id order. Each batch starts
+    right after the last moved id on the primary key index, so it doesn't
+    scan the dead tuples left by the previous batches.
+    """
+
+    last_id = None
+
+    while True:
+        bound = "WHERE id > :last_id" if last_id else ""
+        last_id = (
+            op.get_bind()
+            .execute(
+                sa.text(
+                    f"""
+                    WITH batch AS (
+                        SELECT id FROM content."{partition}"
+                        {bound}
+                        ORDER BY id
+                        LIMIT :batch_size
+                    ),
+                    moved AS (
+                        DELETE FROM content."{partition}"
+                        WHERE id IN (SELECT id FROM batch)
+                        RETURNING *
+                    ),
+                    inserted AS (
+                        INSERT INTO content."auth_history" (timestamp, {COLUMNS})
+                        SELECT coalesce(timestamp, created_on, now()), {COLUMNS}
+                        FROM moved
+                    )
+                    SELECT id FROM batch ORDER BY id DESC LIMIT 1
+                    """
+                ),
+                {"batch_size": MOVE_BATCH_SIZE, "last_id": last_id},
+            )
+            .scalar()
+        )
+
+        if last_id is None:
+            break
+
+
+def upgrade():
+    op.rename_table("auth_history", "auth_history_legacy", schema="content")
+    op.drop_index(
+        "auth_history_user_id_timestamp_id_idx",
+        table_name="auth_history_legacy",
+        schema="content",
+    )
+    op.execute(
+        """
+        CREATE TABLE content."auth_history"
+        (
+            id uuid not null,
+            user_id uuid references content."users",
+            timestamp timestamp default now() not null,
+            user_agent text not null,
+            ip_addr varchar(100),
+            device text,
+            created_on timestamp default now(),
+            updated_on timestamp default now(),
+            platform platformenum default 'pc'::platformenum not null,
+            constraint auth_history_id_timestamp_pk primary key (id, timestamp)
+        )
+        PARTITION BY RANGE (timestamp);
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE content."auth_history_default"
+        PARTITION OF content."auth_history" DEFAULT;
+        """
+    )
+
+    oldest = (
+        op.get_bind()
+        .execute(sa.text('SELECT min(timestamp) FROM content."auth_history_legacy"'))
+        .scalar()
+    )
+    today = date.today()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+
+    while month <= add_months(today, PREMAKE_MONTHS):
+        create_month_partition(month)
+        month = add_months(month, 1)
+
+    op.create_index(
+        "auth_history_user_id_timestamp_id_idx",
+        "auth_history",
+        ["user_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+        schema="content",
+    )
+
+    with op.get_context().autocommit_block():
+        for platform in PLATFORMS:
+            move_partition(f"auth_history_{platform}")
+
+    op.drop_table("auth_history_legacy", schema="content")
+
+
+def downgrade():
+    op.rename_table("auth_history", "auth_history_by_time", schema="content")
+    op.drop_index(
+        "auth_history_user_id_timestamp_id_idx",
+        table_name="auth_history_by_time",
+        schema="content",
+    )
+    op.execute(
+        """
+        CREATE TABLE content."auth_history"
+        (
+            id uuid not null,
+            user_id uuid references content."users",
+            timestamp timestamp default now(),
+            user_agent text not null,
+            ip_addr varchar(100),
+            device text,
+            created_on timestamp default now(),
+            updated_on timestamp default now(),
+            platform platformenum default 'pc'::platformenum not null,
+            constraint id_platform_uc_ primary key (id, platform)
+        )
+        PARTITION BY LIST (platform);
+        """
+    )
+
+    for platform in ("pc", "mobile", "tablet"):
+        op.execute(
+            f"""
+            CREATE TABLE content."auth_history_{platform}"
+            PARTITION OF content."auth_history"
+            FOR VALUES IN ('{platform}');
+            """
+        )
+
+    op.create_index(
+        "auth_history_user_id_timestamp_id_idx",
+        "auth_history",
+        ["user_id", sa.text("timestamp DESC"), sa.text("id DESC")],
+        schema="content",
+    )
+    op.execute(
+        f"""
+        INSERT INTO content."auth_history" (timestamp, {COLUMNS})
+        SELECT timestamp, {COLUMNS} FROM content."auth_history_by_time";
+        """
+    )
+    op.drop_table("auth_history_by_time", schema="content")
@@ -2,7 +2,7 @@ from gevent import monkey
 
 monkey.patch_all()
 
-from copy import deepcopy
+from dataclasses import replace
 
 import pytest
 from alembic import command
@@ -11,13 +11,14 @@ from flask_migrate import Config
 from pytest_mock import MockerFixture
 
 from app import redis
-from app import middlewares
+from app.cache import cache
 from app.database import db, session_scope
 from app.datastore import user_datastore
 from app.main import app
-from app.models import Role, DefaultRoleEnum
-from app.services import storages
+from app.models import Role, DefaultRoleEnum, User
+from app.services import storages, revocation, rate_limit
 from app.services.accounts import AccountsService
+from app.services.identity import identity_cache
 from app.settings import settings
 
 assert settings.TESTING, "You must set TESTING=True env for run the tests."
@@ -50,6 +51,12 @@ def clear_db():
             user_datastore.create_role(name=role)
 
 
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    yield
+    identity_cache.clear()
+
+
 @pytest.fixture
 def client():
     with app.test_client() as client:
@@ -102,24 +109,57 @@ def default_user_auth_refresh_header(default_user_jwt_pair) -> dict[str, str]:
     return {"Authorization": f"Bearer {refresh_token}"}
 
 
+@pytest.fixture
+def admin_login() -> str:
+    return "admin"
+
+
+@pytest.fixture
+def admin_password() -> str:
+    return "password"
+
+
+@pytest.fixture
+def admin_user(admin_login, admin_password) -> User:
+    with session_scope():
+        user = user_datastore.create_user(login=admin_login, password=admin_password)
+        user_datastore.add_role_to_user(user, DefaultRoleEnum.staff.value)
+
+    return user
+
+
+@pytest.fixture
+def admin_jwt_pair(admin_user) -> tuple[str, str]:
+    account_service = AccountsService(admin_user)
+    return account_service.get_token_pair()
+
+
+@pytest.fixture
+def admin_auth_header(admin_jwt_pair) -> dict[str, str]:
+    access_token, _ = admin_jwt_pair
+    return {"Authorization": f"Bearer {access_token}"}
+
+
 @pytest.fixture(autouse=True)
 def mocked_redis(monkeypatch):
     faked_redis = FakeStrictRedis(decode_responses=True)
     monkeypatch.setattr(redis, "redis_conn", faked_redis)
     monkeypatch.setattr(storages, "redis_conn", faked_redis)
     monkeypatch.setattr(storages.token_storage, "redis", faked_redis)
-    monkeypatch.setattr(middlewares, "redis_conn", faked_redis)
+    monkeypatch.setattr(revocation.revocation_mirror, "redis", faked_redis)
+    monkeypatch.setattr(rate_limit.rate_limit_service, "redis", faked_redis)
+    monkeypatch.setattr(rate_limit.rate_limit_service, "limiters", {})
 
 
 @pytest.fixture(autouse=True)
-def mocked_cache(monkeypatch):
-    copy_config = deepcopy(app.config)
-    copy_config["CACHE_TYPE"] = "SimpleCache"
-    del copy_config["CACHE_REDIS_URL"]
-
-    monkeypatch.setattr(app, "config", copy_config)
+def mocked_cache():
+    cache.init_app(app, config={"CACHE_TYPE": "SimpleCache"})
 
 
 @pytest.fixture
 def mocked_rate_limit(monkeypatch):
-    monkeypatch.setattr(settings.RATE_LIMIT, "MAX_CALLS", 4)
+    monkeypatch.setattr(
+        rate_limit.rate_limit_service,
+        "default_policy",
+        replace(rate_limit.rate_limit_service.default_policy, limit=4),
+    )
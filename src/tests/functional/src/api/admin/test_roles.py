@@ -7,6 +7,7 @@ import pytest
 from app.database import session_scope
 from app.datastore import user_datastore
 from app.models import DefaultRoleEnum
+from app.settings import settings
 
 
 @pytest.fixture
@@ -177,3 +178,23 @@ def test_delete_role_doesnt_exists(client, admin_auth_header):
         headers=admin_auth_header,
     )
     assert response.status_code == http.HTTPStatus.NOT_FOUND
+
+
+def test_role_logout(
+    client,
+    monkeypatch,
+    admin_auth_header,
+    default_role,
+    default_user_auth_access_header,
+):
+    monkeypatch.setattr(settings.BLOCKLIST, "WATERMARK_BATCH_SIZE", 1)
+
+    response = client.post(
+        path=f"/admin/roles/{default_role.id}/logout", headers=admin_auth_header
+    )
+    assert response.status_code == http.HTTPStatus.NO_CONTENT
+
+    response = client.get(
+        path="/api/v1/users/history", headers=default_user_auth_access_header
+    )
+    assert response.status_code == http.HTTPStatus.UNAUTHORIZED
@@ -5,6 +5,7 @@ import pytest
 
 from app.datastore import user_datastore
 from app.models import DefaultRoleEnum
+from app.services.identity import identity_cache
 
 
 @pytest.fixture
@@ -62,6 +63,43 @@ def test_change_user_role_ok(client, admin_auth_header, default_user, default_ro
     assert user.has_role(DefaultRoleEnum.staff.value)
 
 
+def test_change_user_role_invalidates_identity_cache(
+    client, admin_auth_header, default_user, default_role
+):
+    assert not identity_cache.get_user(default_user.id).is_admin
+
+    response = client.patch(
+        path=f"/admin/users/{default_user.id}/set-role/{default_role.id}",
+        headers=admin_auth_header,
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert identity_cache.get_user(default_user.id).is_admin
+
+
+def test_change_user_role_invalidates_cached_responses(
+    client, admin_auth_header, default_user, default_role
+):
+    def has_role(role_name):
+        response = client.get(
+            path=f"/admin/users/{default_user.id}/has-role/{role_name}",
+            headers=admin_auth_header,
+        )
+        assert response.status_code == http.HTTPStatus.OK
+        return response.json["has_role"]
+
+    assert has_role(DefaultRoleEnum.guest.value)
+    assert not has_role(DefaultRoleEnum.staff.value)
+
+    response = client.patch(
+        path=f"/admin/users/{default_user.id}/set-role/{default_role.id}",
+        headers=admin_auth_header,
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    assert has_role(DefaultRoleEnum.staff.value)
+
+
 def test_change_user_role_user_doesnt_exists(client, admin_auth_header, default_role):
     user_id = str(uuid4())
     role_id = str(default_role.id)
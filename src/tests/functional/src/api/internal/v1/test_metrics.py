@@ -0,0 +1,16 @@
+import http
+
+
+def test_metrics_ok(client, admin_auth_header):
+    response = client.get(path="/api/internal/v1/metrics", headers=admin_auth_header)
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert {"redis_pool", "redis_breaker", "identity_cache"} <= set(response.json)
+
+
+def test_metrics_forbidden(client, default_user_auth_access_header):
+    response = client.get(
+        path="/api/internal/v1/metrics", headers=default_user_auth_access_header
+    )
+
+    assert response.status_code == http.HTTPStatus.FORBIDDEN
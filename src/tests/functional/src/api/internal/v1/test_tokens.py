@@ -0,0 +1,101 @@
+import http
+
+import pytest
+from flask_jwt_extended import decode_token
+
+from app.services.accounts import AccountsService
+from app.settings import settings
+
+
+@pytest.fixture
+def default_user_access_token(default_user_jwt_pair):
+    access_token, _ = default_user_jwt_pair
+    return access_token
+
+
+@pytest.fixture
+def revoked_access_token(default_user):
+    access_token, _ = AccountsService(default_user).get_token_pair()
+    AccountsService.logout(decode_token(access_token))
+
+    return access_token
+
+
+def test_introspect_ok(
+    client,
+    default_user,
+    default_user_access_token,
+    default_user_auth_access_header,
+    revoked_access_token,
+):
+    response = client.post(
+        path="/api/internal/v1/tokens/introspect",
+        headers=default_user_auth_access_header,
+        json={"tokens": [default_user_access_token, revoked_access_token, "bad"]},
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+
+    valid, revoked, malformed = response.json
+    assert valid["active"]
+    assert valid["sub"] == str(default_user.id)
+    assert valid["roles"] == default_user.roles_names_list
+    assert valid["exp"]
+    assert not revoked["active"]
+    assert not malformed["active"]
+
+
+def test_introspect_too_many_tokens(
+    client, monkeypatch, default_user_access_token, default_user_auth_access_header
+):
+    monkeypatch.setattr(settings.INTROSPECTION, "MAX_TOKENS", 1)
+
+    response = client.post(
+        path="/api/internal/v1/tokens/introspect",
+        headers=default_user_auth_access_header,
+        json={"tokens": [default_user_access_token] * 2},
+    )
+
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("payload", [{}, {"tokens": "token"}, {"tokens": [1]}])
+def test_introspect_invalid_payload(client, default_user_auth_access_header, payload):
+    response = client.post(
+        path="/api/internal/v1/tokens/introspect",
+        headers=default_user_auth_access_header,
+        json=payload,
+    )
+
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+def test_introspect_unauthorized(client, default_user_access_token):
+    response = client.post(
+        path="/api/internal/v1/tokens/introspect",
+        json={"tokens": [default_user_access_token]},
+    )
+
+    assert response.status_code == http.HTTPStatus.UNAUTHORIZED
+
+
+def test_introspect_rotated_refresh_token(
+    client, default_user, default_user_auth_access_header
+):
+    _, refresh_token = AccountsService(default_user).get_token_pair()
+    _, new_refresh_token = AccountsService(default_user).refresh_token_pair(
+        decode_token(refresh_token)["jti"]
+    )
+
+    response = client.post(
+        path="/api/internal/v1/tokens/introspect",
+        headers=default_user_auth_access_header,
+        json={"tokens": [refresh_token, new_refresh_token]},
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+
+    rotated, current = response.json
+    assert not rotated["active"]
+    assert current["active"]
+    assert current["type"] == "refresh"
@@ -2,6 +2,8 @@ import http
 
 import pytest
 
+from app.services.identity import identity_cache
+
 
 @pytest.fixture
 def expected_user_info(default_user):
@@ -41,3 +43,36 @@ def test_user_roles_ok(
 
     assert response.status_code == http.HTTPStatus.OK
     assert response.json == [role.name for role in default_user.roles]
+
+
+def test_user_info_served_from_claims(
+    client,
+    default_user_auth_access_header,
+    expected_user_info,
+):
+    misses = identity_cache.storage.misses
+
+    response = client.get(
+        path="/api/internal/v1/users/info",
+        headers=default_user_auth_access_header,
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json == expected_user_info
+    assert identity_cache.storage.misses == misses
+
+
+def test_claims_only_scoped_to_request(client, default_user_auth_access_header):
+    client.get(
+        path="/api/internal/v1/users/info",
+        headers=default_user_auth_access_header,
+    )
+    misses = identity_cache.storage.misses
+
+    response = client.get(
+        path="/api/v1/users/history",
+        headers=default_user_auth_access_header,
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert identity_cache.storage.misses == misses + 1
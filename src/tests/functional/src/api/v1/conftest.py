@@ -9,3 +9,4 @@ def failed_account_service_logout(monkeypatch):
         raise AccountsServiceError
 
     monkeypatch.setattr(AccountsService, "logout", mocked_return)
+    monkeypatch.setattr(AccountsService, "logout_everywhere", mocked_return)
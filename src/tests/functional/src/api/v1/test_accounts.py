@@ -4,12 +4,17 @@ from datetime import timedelta
 from unittest.mock import ANY
 
 import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
 
+from app.database import db, session_scope
 from app.datastore import user_datastore
 from app.main import app
+from app.passwords import password_hasher
 from app.services.accounts import AccountsService
 from app.services.storages import token_storage, TokenStorageError
 from app.models import AuthHistory
+from app.settings import settings
 
 
 @pytest.fixture
@@ -116,6 +121,49 @@ def test_login_ok(client, default_user, default_user_login, default_user_passwor
     assert login_history
 
 
+def test_login_round_trips(
+    client, monkeypatch, default_user, default_user_login, default_user_password
+):
+    monkeypatch.setattr(settings, "SERVER_TIMING", True)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    event.listen(db.engine, "before_cursor_execute", count)
+
+    try:
+        response = client.post(
+            path="/api/v1/login",
+            data={
+                "login": default_user_login,
+                "password": default_user_password,
+            },
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert response.status_code == http.HTTPStatus.OK
+    # The user with roles, then last_login and history in one transaction.
+    assert sorted(statements) == ["INSERT", "SELECT", "UPDATE"]
+    assert "password;dur=" in response.headers["Server-Timing"]
+
+
+def test_login_server_timing_disabled(
+    client, default_user, default_user_login, default_user_password
+):
+    response = client.post(
+        path="/api/v1/login",
+        data={
+            "login": default_user_login,
+            "password": default_user_password,
+        },
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert "Server-Timing" not in response.headers
+
+
 def test_login_user_doesnt_exists(client):
     response = client.post(
         path="/api/v1/login",
@@ -202,6 +250,39 @@ def test_logout_double_logout_with_the_same_access_token(
     assert response.json == {"msg": "Token has been revoked"}
 
 
+def test_logout_all_revokes_token_pair(
+    client, default_user_auth_access_header, default_user_auth_refresh_header
+):
+    response = client.post(
+        path="/api/v1/logout/all",
+        headers=default_user_auth_access_header,
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    response = client.post(
+        path="/api/v1/logout",
+        headers=default_user_auth_access_header,
+    )
+    assert response.status_code == http.HTTPStatus.UNAUTHORIZED
+    assert response.json == {"msg": "Token has been revoked"}
+
+    response = client.post(
+        path="/api/v1/refresh",
+        headers=default_user_auth_refresh_header,
+    )
+    assert response.status_code == http.HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_all_failed_token_storage(
+    client, default_user_auth_access_header, failed_account_service_logout
+):
+    response = client.post(
+        path="/api/v1/logout/all",
+        headers=default_user_auth_access_header,
+    )
+    assert response.status_code == http.HTTPStatus.FAILED_DEPENDENCY
+
+
 def test_refresh_ok(client, default_user_jwt_pair, default_user_auth_refresh_header):
     response = client.post(
         path="/api/v1/refresh",
@@ -245,3 +326,26 @@ def test_refresh_failed_with_reused_refresh_token(
         headers=default_user_auth_refresh_header,
     )
     assert response.status_code == http.HTTPStatus.UNAUTHORIZED
+
+
+def test_login_rehashes_stale_password(
+    client, default_user, default_user_login, default_user_password
+):
+    with session_scope():
+        default_user._password = generate_password_hash(
+            default_user_password, "pbkdf2:sha256:1000"
+        )
+
+    response = client.post(
+        path="/api/v1/login",
+        data={
+            "login": default_user_login,
+            "password": default_user_password,
+        },
+    )
+
+    assert response.status_code == http.HTTPStatus.OK
+
+    user = user_datastore.find_user(id=default_user.id)
+    assert not password_hasher.needs_rehash(user.password)
+    assert user.check_password(default_user_password)
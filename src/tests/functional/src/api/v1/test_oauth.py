@@ -9,6 +9,7 @@ from app.database import session_scope
 from app.datastore import user_datastore
 from app.models import SocialAccount
 from app.oauth import OauthNameEnum, yandex_compliance_fix
+from app.passwords import password_hasher, PasswordHasherBusyError
 from app.services.accounts import AccountsService, AccountsServiceError
 
 
@@ -124,6 +125,11 @@ def failed_login(mocker: MockerFixture) -> None:
     mocker.patch.object(AccountsService, "login", side_effect=AccountsServiceError)
 
 
+@pytest.fixture
+def busy_password_hasher(mocker: MockerFixture) -> None:
+    mocker.patch.object(password_hasher, "hash", side_effect=PasswordHasherBusyError)
+
+
 @pytest.fixture
 def unknown_social_name() -> str:
     unknown_social_name = "unknown"
@@ -213,6 +219,12 @@ class TestOauthParametrized:
         response = client.get(path=f"/api/v1/auth/{social_name}")
         assert response.status_code == http.HTTPStatus.UNAUTHORIZED
 
+    def test_auth_password_hasher_busy(
+        self, client, mocked_user_info, busy_password_hasher, social_name
+    ):
+        response = client.get(path=f"/api/v1/auth/{social_name}")
+        assert response.status_code == http.HTTPStatus.SERVICE_UNAVAILABLE
+
 
 def test_login_unknown_social_name(client, unknown_social_name):
     response = client.get(path=f"/api/v1/login/{unknown_social_name}")
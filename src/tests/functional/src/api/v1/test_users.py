@@ -6,7 +6,9 @@ import pytest
 
 from app.database import session_scope
 from app.datastore import user_datastore
-from app.models import AuthHistory
+from app.models import AuthHistory, PlatformEnum
+from app.services.identity import identity_cache
+from app.settings import settings
 
 
 @pytest.fixture
@@ -153,5 +155,120 @@ def test_user_history_list_ok(
     assert response.status_code == http.HTTPStatus.OK
 
     result = response.json
-    assert len(result) == len(expected_user_history_list)
-    assert result == expected_user_history_list
+    assert result["items"] == expected_user_history_list
+    assert result["next_cursor"] is None
+    assert result["prev_cursor"] is None
+
+
+def test_user_history_cursor_pagination(
+    client, default_user_auth_access_header, create_auth_history
+):
+    def get_page(cursor=None):
+        response = client.get(
+            path="/api/v1/users/history",
+            headers=default_user_auth_access_header,
+            query_string={"per_page": 2, "cursor": cursor},
+        )
+        assert response.status_code == http.HTTPStatus.OK
+        return response.json
+
+    first = get_page()
+    assert len(first["items"]) == 2
+    assert first["prev_cursor"] is None
+
+    second = get_page(first["next_cursor"])
+    assert len(second["items"]) == 1
+    assert second["next_cursor"] is None
+
+    ids = [item["id"] for item in first["items"] + second["items"]]
+    assert len(set(ids)) == 3
+    assert get_page(second["prev_cursor"]) == first
+
+
+def test_user_history_invalid_cursor(client, default_user_auth_access_header):
+    response = client.get(
+        path="/api/v1/users/history",
+        headers=default_user_auth_access_header,
+        query_string={"cursor": "invalid"},
+    )
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize("per_page", [0, -2])
+def test_user_history_invalid_per_page(
+    client, default_user_auth_access_header, per_page
+):
+    response = client.get(
+        path="/api/v1/users/history",
+        headers=default_user_auth_access_header,
+        query_string={"per_page": per_page},
+    )
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+def test_user_history_per_page_capped(
+    client, monkeypatch, default_user_auth_access_header, create_auth_history
+):
+    monkeypatch.setattr(settings.PAGINATION, "MAX_PAGE_LIMIT", 2)
+
+    response = client.get(
+        path="/api/v1/users/history",
+        headers=default_user_auth_access_header,
+        query_string={"per_page": 10},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    assert len(response.json["items"]) == 2
+    assert response.json["next_cursor"]
+
+
+def test_user_history_cached(
+    client,
+    default_user,
+    default_user_login,
+    default_user_password,
+    default_user_auth_access_header,
+    create_auth_history,
+):
+    def get_history():
+        response = client.get(
+            path="/api/v1/users/history",
+            headers=default_user_auth_access_header,
+            query_string={"per_page": 10},
+        )
+        assert response.status_code == http.HTTPStatus.OK
+        return response.json["items"]
+
+    assert len(get_history()) == 3
+
+    with session_scope() as session:
+        session.add(
+            AuthHistory(
+                user_id=default_user.id,
+                user_agent="Direct insert",
+                platform=PlatformEnum.pc,
+            )
+        )
+
+    assert len(get_history()) == 3
+
+    response = client.post(
+        path="/api/v1/login",
+        data={"login": default_user_login, "password": default_user_password},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    assert len(get_history()) == 5
+
+
+def test_user_lookup_cached(client, default_user_auth_access_header):
+    hits, misses = identity_cache.storage.hits, identity_cache.storage.misses
+
+    for _ in range(2):
+        response = client.get(
+            path="/api/v1/users/history",
+            headers=default_user_auth_access_header,
+        )
+        assert response.status_code == http.HTTPStatus.OK
+
+    assert identity_cache.storage.hits - hits == 1
+    assert identity_cache.storage.misses - misses == 1
@@ -0,0 +1,69 @@
+import http
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import PyJWK, decode, get_unverified_header
+
+from app.keys import KeyRing, SigningKey
+from app.main import app
+
+
+@pytest.fixture
+def rs256_key_ring(monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_ring = KeyRing([SigningKey(kid="rsa-1", private_key=private_key)])
+
+    monkeypatch.setattr("app.jwt.key_ring", key_ring)
+    monkeypatch.setattr("app.api.well_known.jwks.key_ring", key_ring)
+    monkeypatch.setitem(app.config, "JWT_ALGORITHM", "RS256")
+    monkeypatch.setitem(app.config, "JWT_DECODE_ALGORITHMS", key_ring.algorithms)
+
+    return key_ring
+
+
+def test_jwks_ok(client):
+    response = client.get(path="/.well-known/jwks.json")
+
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json == {"keys": []}
+    assert response.headers["ETag"]
+    assert "max-age" in response.headers["Cache-Control"]
+
+
+def test_jwks_not_modified(client):
+    response = client.get(path="/.well-known/jwks.json")
+
+    response = client.get(
+        path="/.well-known/jwks.json",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+
+    assert response.status_code == http.HTTPStatus.NOT_MODIFIED
+
+
+def test_rs256_token_verified_with_jwks(
+    client, rs256_key_ring, default_user, default_user_login, default_user_password
+):
+    response = client.post(
+        path="/api/v1/login",
+        data={"login": default_user_login, "password": default_user_password},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    access_token = response.json["access_token"]
+    header = get_unverified_header(access_token)
+    assert header["alg"] == "RS256"
+    assert header["kid"] == "rsa-1"
+
+    response = client.get(
+        path="/api/v1/users/history",
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    response = client.get(path="/.well-known/jwks.json")
+    jwks = {jwk["kid"]: jwk for jwk in response.json["keys"]}
+    public_key = PyJWK(jwks[header["kid"]]).key
+
+    claims = decode(access_token, public_key, algorithms=["RS256"])
+    assert claims["sub"] == str(default_user.id)
@@ -2,18 +2,136 @@ import http
 
 import pytest
 
+from app.main import app
+from app.services.rate_limit import rate_limit_service, RateLimitError
+from app.settings import settings
+
 
 def test_rate_limit(
     client,
     mocked_rate_limit,
 ):
     response = client.get(
-        path="/api/internal/v1/users/info",
+        path="/api/v1/users/history",
     )
 
+    for i in range(6):
+        response = client.get(
+            path="/api/v1/users/history",
+        )
+
+    assert response.status_code == http.HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers["RateLimit-Remaining"] == "0"
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_rate_limit_headers(client, mocked_rate_limit):
+    response = client.get(
+        path="/api/v1/users/history",
+    )
+
+    assert response.headers["RateLimit-Limit"] == "4"
+    assert response.headers["RateLimit-Remaining"] == "3"
+    assert int(response.headers["RateLimit-Reset"]) > 0
+    assert "Retry-After" not in response.headers
+
+
+def test_rate_limit_redis_unavailable(client, monkeypatch):
+    def mocked_hit(*args, **kwargs):
+        raise RateLimitError
+
+    monkeypatch.setattr(rate_limit_service, "hit", mocked_hit)
+
+    response = client.get(
+        path="/api/v1/users/history",
+    )
+
+    assert response.status_code == http.HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_login_rate_limit_by_login_and_ip(client):
+    for i in range(settings.RATE_LIMIT.LOGIN_MAX_CALLS):
+        client.post(
+            path="/api/v1/login",
+            data={"login": "victim", "password": "wrong"},
+            environ_base={"REMOTE_ADDR": "10.0.0.1"},
+        )
+
+    response = client.post(
+        path="/api/v1/login",
+        data={"login": "victim", "password": "wrong"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"},
+    )
+    assert response.status_code == http.HTTPStatus.TOO_MANY_REQUESTS
+
+    # the account is not locked out from other ips
+    response = client.post(
+        path="/api/v1/login",
+        data={"login": "victim", "password": "wrong"},
+        environ_base={"REMOTE_ADDR": "10.0.1.0"},
+    )
+    assert response.status_code == http.HTTPStatus.UNAUTHORIZED
+
+
+def test_login_cost_weight(client):
+    client.post(
+        path="/api/v1/login",
+        data={"login": "user", "password": "wrong"},
+    )
+    response = client.get(
+        path="/api/v1/users/history",
+    )
+
+    assert response.headers["RateLimit-Remaining"] == str(
+        settings.RATE_LIMIT.MAX_CALLS - settings.RATE_LIMIT.PASSWORD_CHECK_COST - 1
+    )
+
+
+def test_internal_rate_limit_by_sub(
+    client, mocked_rate_limit, default_user_auth_access_header
+):
+    # the default policy doesn't apply to the internal namespace
     for i in range(6):
         response = client.get(
             path="/api/internal/v1/users/info",
+            headers=default_user_auth_access_header,
         )
 
+    assert response.status_code != http.HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers["RateLimit-Limit"] == str(
+        settings.RATE_LIMIT.INTERNAL_MAX_CALLS
+    )
+
+
+def test_internal_rate_limit_without_sub(client, mocked_rate_limit):
+    # unauthenticated callers get the default limit by ip
+    for i in range(4):
+        client.get(
+            path="/api/internal/v1/users/info",
+        )
+
+    response = client.get(
+        path="/api/internal/v1/users/info",
+    )
+
     assert response.status_code == http.HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers["RateLimit-Limit"] == "4"
+
+
+def test_rate_limit_headers_not_leaked(client, monkeypatch):
+    def mocked_hit(*args, **kwargs):
+        raise RateLimitError
+
+    # requests share `g` of an already pushed app context
+    with app.app_context():
+        client.get(
+            path="/api/v1/users/history",
+        )
+        monkeypatch.setattr(rate_limit_service, "hit", mocked_hit)
+
+        response = client.get(
+            path="/api/v1/users/history",
+        )
+
+    assert response.status_code == http.HTTPStatus.SERVICE_UNAVAILABLE
+    assert "RateLimit-Limit" not in response.headers
@@ -0,0 +1,56 @@
+from datetime import datetime
+from uuid import uuid4
+
+import gevent
+import pytest
+
+from app.models import AuthHistory, PlatformEnum
+from app.services.auth_history import AuthHistoryWriter
+
+
+@pytest.fixture
+def writer():
+    writer = AuthHistoryWriter(
+        enabled=True, max_size=1, batch_size=10, flush_interval=0.01
+    )
+
+    yield writer
+
+    if writer._flusher is not None:
+        writer._flusher.kill()
+
+
+def make_row(user_id):
+    return dict(
+        id=uuid4(),
+        user_id=user_id,
+        timestamp=datetime.utcnow(),
+        user_agent="test",
+        ip_addr="127.0.0.1",
+        device="Other",
+        platform=PlatformEnum.pc,
+    )
+
+
+def test_rows_are_written_in_background(writer, default_user):
+    writer.write(**make_row(default_user.id))
+
+    assert writer.stats["queued"] == 1
+    assert not AuthHistory.query.filter_by(user_id=default_user.id).count()
+
+    gevent.sleep(0.1)
+
+    assert AuthHistory.query.filter_by(user_id=default_user.id).count() == 1
+    assert writer.stats["written"] == 1
+
+
+def test_full_queue_writes_synchronously(writer, default_user):
+    writer.write(**make_row(default_user.id))
+    writer.write(**make_row(default_user.id))
+
+    assert writer.stats["written_sync"] == 1
+    assert AuthHistory.query.filter_by(user_id=default_user.id).count() == 1
+
+    writer.flush()
+
+    assert AuthHistory.query.filter_by(user_id=default_user.id).count() == 2
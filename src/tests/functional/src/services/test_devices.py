@@ -0,0 +1,48 @@
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import PlatformEnum
+from app.services.devices import DeviceClassifier
+
+IPHONE = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 15_0 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/15.0 Mobile/15E148 Safari/604.1"
+)
+
+
+def test_classify_is_memoized():
+    classifier = DeviceClassifier(max_size=10)
+
+    first = classifier.classify(IPHONE)
+
+    assert first.device == "iPhone"
+    assert first.platform == PlatformEnum.mobile
+    assert classifier.classify(IPHONE) is first
+    assert classifier.storage.stats["hits"] == 1
+
+
+def test_warm_up_from_history(
+    client, default_user, default_user_login, default_user_password
+):
+    client.post(
+        path="/api/v1/login",
+        data={"login": default_user_login, "password": default_user_password},
+        headers={"User-Agent": IPHONE},
+    )
+    classifier = DeviceClassifier(max_size=10)
+
+    classifier.warm_up(10, days=1)
+
+    assert classifier.storage.get(IPHONE).platform == PlatformEnum.mobile
+
+
+def test_warm_up_database_error(monkeypatch):
+    def query(*args):
+        raise OperationalError("SELECT", {}, Exception())
+
+    monkeypatch.setattr(db.session, "query", query)
+    classifier = DeviceClassifier(max_size=10)
+
+    classifier.warm_up(10, days=1)
+
+    assert classifier.storage.stats["size"] == 0
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.database import session_scope
+from app.services.partitions import MonthlyPartitions, auth_history_partitions
+from app.settings import settings
+
+
+@pytest.fixture
+def partitions():
+    table = f'"{settings.DB.SCHEMA}"."partitions_test"'
+
+    with session_scope() as session:
+        session.execute(
+            text(f"CREATE TABLE {table} (ts timestamp) PARTITION BY RANGE (ts)")
+        )
+        session.execute(
+            text(
+                f'CREATE TABLE "{settings.DB.SCHEMA}"."partitions_test_default" '
+                f"PARTITION OF {table} DEFAULT"
+            )
+        )
+
+    yield MonthlyPartitions(
+        table="partitions_test",
+        schema=settings.DB.SCHEMA,
+        column="ts",
+        premake=2,
+        retention=1,
+    )
+
+    with session_scope() as session:
+        session.execute(text(f"DROP TABLE {table}"))
+
+
+def test_create_ahead(partitions):
+    assert partitions.create(today=date(2021, 12, 15)) == [
+        "partitions_test_y2021m12",
+        "partitions_test_y2022m01",
+        "partitions_test_y2022m02",
+    ]
+    assert partitions.create(today=date(2022, 1, 1)) == ["partitions_test_y2022m03"]
+
+
+def test_create_moves_default_rows(partitions):
+    schema = settings.DB.SCHEMA
+
+    with session_scope() as session:
+        session.execute(
+            text(
+                f'INSERT INTO "{schema}"."partitions_test" (ts) '
+                "VALUES ('2021-11-30 23:59'), ('2022-01-10'), ('2022-01-31 23:59')"
+            )
+        )
+
+    assert partitions.create(today=date(2021, 12, 15)) == [
+        "partitions_test_y2021m12",
+        "partitions_test_y2022m01",
+        "partitions_test_y2022m02",
+    ]
+    assert partitions.get_default() == "partitions_test_default"
+
+    with session_scope() as session:
+        counts = {
+            name: session.execute(
+                text(f'SELECT count(*) FROM "{schema}"."{name}"')
+            ).scalar()
+            for name in ("partitions_test_default", "partitions_test_y2022m01")
+        }
+
+    assert counts == {"partitions_test_default": 1, "partitions_test_y2022m01": 2}
+
+
+def test_expire(partitions):
+    partitions.create(today=date(2021, 12, 1))
+
+    assert partitions.expire(today=date(2022, 2, 1), drop=True) == [
+        "partitions_test_y2021m12"
+    ]
+    assert list(partitions.get_partitions()) == [date(2022, 1, 1), date(2022, 2, 1)]
+
+
+def test_auth_history_partitions_exist():
+    assert date.today().replace(day=1) in auth_history_partitions.get_partitions()
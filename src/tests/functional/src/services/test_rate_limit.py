@@ -0,0 +1,81 @@
+import gevent
+import pytest
+
+from app.services.rate_limit import (
+    GCRARateLimiter,
+    HybridRateLimiter,
+    RateLimitPolicy,
+)
+from app.services.storages import token_storage
+
+
+@pytest.fixture
+def limiter():
+    return GCRARateLimiter(redis=token_storage.redis, limit=2, period=60)
+
+
+@pytest.fixture
+def key():
+    return RateLimitPolicy(name="test", limit=2, period=60).make_key(b"\x7f\0\0\1")
+
+
+def test_gcra_spreads_requests_over_period(limiter, key):
+    first, second, third = [limiter.hit(key) for _ in range(3)]
+
+    assert first.allowed and first.remaining == 1
+    assert second.allowed and second.remaining == 0
+    assert not third.allowed
+    assert 29 < third.retry_after <= 30
+    assert 59 < third.reset_after <= 60
+
+
+@pytest.fixture
+def hybrid_limiter(limiter):
+    limiter.limit = 10
+    return HybridRateLimiter(limiter=limiter, chunk_size=4, max_keys=100)
+
+
+def test_hybrid_limiter_admits_from_local_bucket(monkeypatch, hybrid_limiter, key):
+    reserved = []
+    reserve = hybrid_limiter._reserve
+    monkeypatch.setattr(
+        hybrid_limiter,
+        "_reserve",
+        lambda key, size: reserved.append(key) or reserve(key, size),
+    )
+
+    results = [hybrid_limiter.hit(key) for _ in range(3)]
+
+    assert all(result.allowed for result in results)
+    assert [result.remaining for result in results] == [3, 2, 1]
+    assert len(reserved) == 1
+
+    # the bucket ran low, so it gets refilled in the background
+    gevent.sleep(0.01)
+
+    assert len(reserved) == 2
+    assert hybrid_limiter.buckets.get(key).tokens == 5
+
+
+def test_hybrid_limiter_never_exceeds_global_limit(hybrid_limiter, key):
+    other_worker = HybridRateLimiter(
+        limiter=hybrid_limiter.limiter, chunk_size=4, max_keys=100
+    )
+
+    allowed = 0
+
+    for _ in range(10):
+        allowed += hybrid_limiter.hit(key).allowed
+        allowed += other_worker.hit(key).allowed
+        gevent.sleep(0.01)
+
+    assert allowed == 10
+
+    result = hybrid_limiter.hit(key)
+
+    assert not result.allowed
+    assert 0 < result.retry_after <= 6
+
+
+def test_hybrid_limiter_reserves_cost_above_chunk(hybrid_limiter, key):
+    assert hybrid_limiter.hit(key, cost=6).allowed
@@ -0,0 +1,83 @@
+from time import time
+from uuid import uuid4
+
+import gevent
+import pytest
+
+from app.services.revocation import RevocationMirror
+from app.services.storages import token_storage
+from app.settings import settings
+
+
+@pytest.fixture
+def mirror():
+    mirror = RevocationMirror(
+        redis=token_storage.redis,
+        channel=settings.REVOCATION_MIRROR.CHANNEL,
+        bucket_size=settings.REVOCATION_MIRROR.BUCKET_SIZE,
+        max_staleness=settings.REVOCATION_MIRROR.MAX_STALENESS,
+        warmup=0,
+        poll_interval=0.01,
+        retry_interval=0.01,
+    )
+    mirror.start()
+    gevent.sleep(0.1)
+
+    yield mirror
+
+    mirror._listener.kill()
+
+
+def make_payload(token_type="access", sub=None, iat_ms=None):
+    now = time()
+
+    return {
+        "jti": str(uuid4()),
+        "sub": str(sub or uuid4()),
+        "type": token_type,
+        "iat": int(now),
+        "iat_ms": iat_ms or int(now * 1000),
+        "exp": int(now) + settings.JWT.ACCESS_TOKEN_EXPIRES,
+    }
+
+
+def test_mirror_receives_revoked_tokens(mirror):
+    payload = make_payload()
+
+    token_storage.invalidate_token_pair(payload["jti"], payload["exp"], uuid4())
+    gevent.sleep(0.1)
+
+    assert mirror.is_revoked(payload) is True
+    assert mirror.is_revoked(make_payload()) is False
+
+
+def test_mirror_receives_watermarks(mirror):
+    user_id = uuid4()
+    payload = make_payload(sub=user_id)
+
+    token_storage.set_watermark([user_id], payload["iat_ms"] + 1)
+    gevent.sleep(0.1)
+
+    assert mirror.is_revoked(payload) is True
+    assert (
+        mirror.is_revoked(make_payload(sub=user_id, iat_ms=payload["iat_ms"] + 1))
+        is False
+    )
+    assert mirror.is_revoked(make_payload()) is False
+
+
+def test_mirror_drops_expired_buckets(mirror):
+    payload = make_payload()
+    mirror.add(payload["jti"], int(time()) - settings.REVOCATION_MIRROR.BUCKET_SIZE)
+
+    assert mirror.is_revoked(payload) is False
+
+
+def test_mirror_doesnt_answer_for_refresh_tokens(mirror):
+    assert mirror.is_revoked(make_payload(token_type="refresh")) is None
+
+
+def test_stale_mirror_doesnt_answer(mirror):
+    mirror.warmup = settings.JWT.ACCESS_TOKEN_EXPIRES
+
+    assert mirror.is_revoked(make_payload()) is None
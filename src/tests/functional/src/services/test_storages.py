@@ -0,0 +1,114 @@
+from time import time
+from uuid import uuid4
+
+import pytest
+
+from app.services.storages import (
+    token_storage,
+    InvalidTokenError,
+    KeysBlocklist,
+    BucketedBlocklist,
+)
+from app.settings import settings
+
+
+def make_access_token(user_id, iat_ms=None):
+    now = time()
+
+    return {
+        "jti": str(uuid4()),
+        "sub": str(user_id),
+        "type": "access",
+        "iat": int(now),
+        "iat_ms": iat_ms or int(now * 1000),
+        "exp": int(now) + settings.JWT.ACCESS_TOKEN_EXPIRES,
+    }
+
+
+@pytest.fixture
+def user_id():
+    return uuid4()
+
+
+@pytest.fixture
+def refresh_token_jti(user_id):
+    jti = str(uuid4())
+    token_storage.set_refresh_token(jti, user_id)
+
+    return jti
+
+
+def test_rotate_refresh_token_ok(user_id, refresh_token_jti):
+    new_jti = str(uuid4())
+
+    token_storage.rotate_refresh_token(refresh_token_jti, new_jti, user_id)
+
+    assert token_storage.redis.get(str(user_id)) == new_jti
+
+
+def test_rotate_reused_refresh_token(user_id, refresh_token_jti):
+    with pytest.raises(InvalidTokenError):
+        token_storage.rotate_refresh_token(str(uuid4()), str(uuid4()), user_id)
+
+    assert token_storage.redis.get(str(user_id)) is None
+
+    with pytest.raises(InvalidTokenError):
+        token_storage.rotate_refresh_token(refresh_token_jti, str(uuid4()), user_id)
+
+
+@pytest.mark.parametrize(
+    "blocklist",
+    [KeysBlocklist(), BucketedBlocklist(bucket_size=60, shards=4)],
+)
+def test_invalidate_token_pair(monkeypatch, blocklist, user_id, refresh_token_jti):
+    monkeypatch.setattr(token_storage, "blocklist", blocklist)
+    access_token = make_access_token(user_id)
+
+    assert not token_storage.validate_access_token(access_token)
+
+    token_storage.invalidate_token_pair(
+        access_token["jti"], access_token["exp"], user_id
+    )
+
+    assert token_storage.validate_access_token(access_token)
+    assert token_storage.validate_access_tokens(
+        [access_token, make_access_token(user_id)]
+    ) == [True, False]
+    assert token_storage.redis.get(str(user_id)) is None
+
+
+def test_set_watermark(user_id, refresh_token_jti):
+    access_token = make_access_token(user_id)
+
+    token_storage.set_watermark([user_id], access_token["iat_ms"] + 1)
+
+    assert token_storage.validate_access_tokens(
+        [
+            access_token,
+            make_access_token(user_id, iat_ms=access_token["iat_ms"] + 1),
+            make_access_token(uuid4(), iat_ms=access_token["iat_ms"]),
+        ]
+    ) == [True, False, False]
+    assert token_storage.redis.get(str(user_id)) is None
+
+
+def test_set_watermark_in_batches(monkeypatch):
+    monkeypatch.setattr(settings.BLOCKLIST, "WATERMARK_BATCH_SIZE", 2)
+    user_ids = [uuid4() for _ in range(3)]
+    access_tokens = [make_access_token(user_id) for user_id in user_ids]
+
+    token_storage.set_watermark(
+        (user_id for user_id in user_ids), access_tokens[-1]["iat_ms"] + 1
+    )
+
+    assert token_storage.validate_access_tokens(access_tokens) == [True] * 3
+
+
+def test_set_global_watermark(user_id):
+    access_token = make_access_token(user_id)
+
+    token_storage.set_global_watermark(access_token["iat_ms"] + 1)
+
+    assert token_storage.validate_access_tokens(
+        [access_token, make_access_token(uuid4(), iat_ms=access_token["iat_ms"])]
+    ) == [True, True]
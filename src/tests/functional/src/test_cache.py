@@ -0,0 +1,228 @@
+import pickle
+from time import time
+
+import gevent
+import pytest
+from fakeredis import FakeServer, FakeStrictRedis
+
+from app.cache import ResponseCache, SerializedRedisCache, TwoTierCache, cache
+from app.main import app
+from app.serializers import get_serializer
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def make_worker(server):
+    worker = TwoTierCache(host=FakeStrictRedis(server=server), l1_ttl=60)
+    worker.start()
+    gevent.sleep(0.01)
+
+    return worker
+
+
+@pytest.fixture
+def workers(server):
+    workers = [make_worker(server), make_worker(server)]
+
+    yield workers
+
+    for worker in workers:
+        worker._listener.kill()
+
+
+def test_repeat_reads_are_served_from_l1(workers):
+    first, second = workers
+    first.set("key", {"value": 1})
+    gevent.sleep(0.01)
+
+    assert second.get("key") == {"value": 1}
+
+    second._write_client.delete("key")
+
+    assert second.get("key") == {"value": 1}
+    assert second.l1.hits == 1
+
+
+def test_writes_invalidate_other_workers_l1(workers):
+    first, second = workers
+    first.set("key", 1)
+    first.set("version", 1)
+
+    assert second.get_many("key", "version") == [1, 1]
+
+    first.set("key", 2)
+    first.inc("version")
+    gevent.sleep(0.01)
+
+    assert second.get_many("key", "version") == [2, 2]
+
+    first.clear()
+    gevent.sleep(0.01)
+
+    assert second.get("key") is None
+
+
+def test_missing_keys_are_cached_in_l1(workers):
+    first, second = workers
+
+    assert second.get_many("version") == [None]
+    assert second.get_many("version") == [None]
+    assert second.get("version") is None
+    assert second.l1.hits == 2
+
+    first.inc("version")
+    gevent.sleep(0.01)
+
+    assert second.get_many("version") == [1]
+
+
+def test_l1_is_bypassed_without_subscription(server):
+    worker = TwoTierCache(host=FakeStrictRedis(server=server))
+    worker.start = lambda: None
+    worker.set("key", 1)
+
+    assert worker.get("key") == 1
+    assert worker.l1.stats["size"] == 0
+
+
+def test_values_are_stored_without_pickle(server):
+    backend = SerializedRedisCache(host=FakeStrictRedis(server=server))
+    backend.set("key", {"roles": ["guest"]})
+    backend.set("counter", 1)
+    backend.inc("counter")
+
+    assert backend._write_client.get("key") == b'~{"roles":["guest"]}'
+    assert backend.get("counter") == 2
+
+    backend._write_client.set("legacy", b"!" + pickle.dumps({"roles": ["guest"]}))
+
+    assert backend.get("legacy") is None
+
+
+@pytest.mark.parametrize(
+    "serializer", [get_serializer("json", 1), get_serializer("msgpack")]
+)
+def test_values_of_another_serializer_are_misses(server, serializer):
+    backend = SerializedRedisCache(host=FakeStrictRedis(server=server))
+    backend.set("key", {"roles": ["guest"]})
+
+    backend = SerializedRedisCache(
+        host=FakeStrictRedis(server=server), serializer=serializer
+    )
+
+    assert backend.get("key") is None
+
+
+@pytest.fixture
+def response_cache():
+    return ResponseCache(cache, lock_timeout=1, poll_interval=0.01, xfetch_beta=1.0)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def view(response_cache, calls):
+    @response_cache.cached(timeout=60, user_arg="user_id")
+    def view(user_id):
+        calls.append(user_id)
+        gevent.sleep(0.05)
+        return {"calls": len(calls)}
+
+    return view
+
+
+def call_view(view):
+    with app.test_request_context("/view"):
+        return view(user_id="user")
+
+
+def set_entry(response_cache, value, delta, expires_in):
+    with app.test_request_context("/view"):
+        key = response_cache._make_key("user", {"user_id": "user"})
+        cache.set(
+            key, {"value": value, "delta": delta, "expires_at": time() + expires_in}
+        )
+
+    return key
+
+
+def test_concurrent_misses_are_coalesced(response_cache, view, calls):
+    greenlets = [gevent.spawn(call_view, view) for _ in range(5)]
+    gevent.joinall(greenlets, raise_error=True)
+
+    assert [greenlet.value for greenlet in greenlets] == [{"calls": 1}] * 5
+    assert len(calls) == 1
+    assert response_cache.stats["coalesced"] == 4
+
+
+def test_locked_key_waits_for_other_worker(response_cache, view, calls):
+    with app.test_request_context("/view"):
+        key = response_cache._make_key("user", {"user_id": "user"})
+        cache.add(f"{key}:lock", 1)
+
+    gevent.spawn_later(0.05, set_entry, response_cache, {"calls": 0}, 0, 60)
+
+    assert call_view(view) == {"calls": 0}
+    assert calls == []
+    assert response_cache.stats["lock_waits"] == 1
+
+
+def test_locked_key_wait_failure_computes(monkeypatch, response_cache, view, calls):
+    with app.test_request_context("/view"):
+        key = response_cache._make_key("user", {"user_id": "user"})
+        cache.add(f"{key}:lock", 1)
+
+    get_many = cache.get_many
+
+    def mocked_get_many(*keys):
+        if f"{key}:lock" in keys:
+            raise ConnectionError
+
+        return get_many(*keys)
+
+    monkeypatch.setattr(cache, "get_many", mocked_get_many)
+
+    assert call_view(view) == {"calls": 1}
+    assert response_cache.stats["lock_waits"] == 1
+
+
+def test_locked_key_serves_stale_value(response_cache, view, calls):
+    key = set_entry(response_cache, {"calls": 0}, delta=1000, expires_in=1)
+
+    with app.app_context():
+        cache.add(f"{key}:lock", 1)
+
+    assert call_view(view) == {"calls": 0}
+    assert calls == []
+    assert response_cache.stats["stale_served"] == 1
+
+
+def test_hot_key_is_refreshed_before_expiry(monkeypatch, response_cache, view, calls):
+    # the median draw, the gap is about 700 times the computation time
+    monkeypatch.setattr("app.cache.random", lambda: 0.5)
+    set_entry(response_cache, {"calls": 0}, delta=1000, expires_in=1)
+
+    assert call_view(view) == {"calls": 1}
+    assert response_cache.stats["early_refreshes"] == 1
+
+    assert call_view(view) == {"calls": 1}
+    assert response_cache.stats["hits"] == 1
+
+
+def test_failed_computation_releases_lock(response_cache):
+    @response_cache.cached(timeout=60, user_arg="user_id")
+    def view(user_id):
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        call_view(view)
+
+    with app.test_request_context("/view"):
+        key = response_cache._make_key("user", {"user_id": "user"})
+        assert cache.get(f"{key}:lock") is None
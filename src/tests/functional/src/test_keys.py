@@ -0,0 +1,47 @@
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+)
+
+from app.keys import KeyRing
+
+
+@pytest.fixture
+def keys_dir(tmp_path):
+    keys = {
+        "rsa-1": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ed-2": ed25519.Ed25519PrivateKey.generate(),
+    }
+
+    for kid, key in keys.items():
+        pem = key.private_bytes(Encoding.PEM, PrivateFormat.PKCS8, NoEncryption())
+        (tmp_path / f"{kid}.pem").write_bytes(pem)
+
+    return tmp_path
+
+
+def test_key_ring_from_dir(keys_dir):
+    key_ring = KeyRing.from_dir(str(keys_dir), signing_kid="ed-2")
+
+    assert key_ring.signing_key.kid == "ed-2"
+    assert key_ring.algorithms == ["EdDSA", "RS256"]
+    assert {jwk["kid"]: jwk["kty"] for jwk in key_ring.jwks["keys"]} == {
+        "ed-2": "OKP",
+        "rsa-1": "RSA",
+    }
+
+
+def test_key_ring_unknown_signing_kid(keys_dir):
+    with pytest.raises(ValueError):
+        KeyRing.from_dir(str(keys_dir), signing_kid="unknown")
+
+
+def test_empty_key_ring():
+    key_ring = KeyRing.from_dir("")
+
+    assert not key_ring
+    assert key_ring.signing_key is None
+    assert key_ring.jwks == {"keys": []}
@@ -1,6 +1,13 @@
+import csv
+import gzip
+
+import orjson
+import pytest
+import zstandard
 from typer.testing import CliRunner
+from werkzeug.security import generate_password_hash
 
-from app.models import User, DefaultRoleEnum
+from app.models import DefaultRoleEnum, PlatformEnum, User
 from app.settings import settings
 from manage import typer_app
 
@@ -73,3 +80,73 @@ def test_create_superuser_exists_user():
         typer_app, ["create-superuser", "--login", login, "--password", passwd]
     )
     assert result.exit_code != 0
+
+
+def test_import_users(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "login,email,password,password_hash\n"
+        "imported,imported@example.com,passwd,\n"
+        f"prehashed,,,{generate_password_hash('secret')}\n"
+        ",nologin@example.com,passwd,\n"
+        "nopassword,,,\n"
+    )
+
+    result = runner.invoke(typer_app, ["import-users", str(path), "--workers", "1"])
+    assert result.exit_code == 0
+    assert "processed 4, imported 2, invalid 2" in result.output
+    assert not User.query.filter_by(login="nopassword").first()
+
+    for login, passwd in (("imported", "passwd"), ("prehashed", "secret")):
+        user = User.query.filter_by(login=login).first()
+
+        assert user.has_role(DefaultRoleEnum.guest.value)
+        assert user.check_password(passwd)
+
+    result = runner.invoke(typer_app, ["import-users", str(path), "--workers", "1"])
+    assert result.exit_code == 0
+    assert "processed 4, imported 0, invalid 2" in result.output
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_export_users(tmp_path, default_user, default_user_login, compression):
+    path = tmp_path / "users.ndjson"
+
+    result = runner.invoke(
+        typer_app, ["export", "users", str(path), "--compression", compression]
+    )
+    assert result.exit_code == 0
+
+    data = path.read_bytes()
+
+    if compression == "gzip":
+        data = gzip.decompress(data)
+    elif compression == "zstd":
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    rows = [orjson.loads(line) for line in data.splitlines()]
+    user = next(row for row in rows if row["login"] == default_user_login)
+
+    assert user["id"] == str(default_user.id)
+    assert user["roles"] == [DefaultRoleEnum.guest.value]
+
+
+def test_export_history_csv(
+    tmp_path, client, default_user, default_user_login, default_user_password
+):
+    path = tmp_path / "history.csv"
+    client.post(
+        path="/api/v1/login",
+        data={"login": default_user_login, "password": default_user_password},
+    )
+
+    result = runner.invoke(
+        typer_app, ["export", "history", str(path), "--format", "csv"]
+    )
+    assert result.exit_code == 0
+    assert "exported 1 rows" in result.output
+
+    rows = list(csv.DictReader(path.open()))
+
+    assert rows[0]["user_id"] == str(default_user.id)
+    assert rows[0]["platform"] == PlatformEnum.pc.value
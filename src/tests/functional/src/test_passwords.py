@@ -0,0 +1,61 @@
+import gevent
+import pytest
+
+from app.passwords import PasswordHasher, PasswordHasherBusyError
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(max_workers=1, max_queue=1)
+
+
+def test_hash_and_check(hasher):
+    pwhash = hasher.hash("test")
+
+    assert hasher.check(pwhash, "test")
+    assert not hasher.check(pwhash, "wrong")
+    assert hasher.stats["in_flight"] == 0
+
+
+def test_hashing_does_not_block_other_greenlets(hasher):
+    ticks = []
+
+    def ticker():
+        while True:
+            ticks.append(1)
+            gevent.sleep(0.001)
+
+    ticking = gevent.spawn(ticker)
+    gevent.sleep(0)
+    hasher.hash("test")
+    ticking.kill()
+
+    assert len(ticks) > 1
+
+
+def test_busy_hasher_rejects(hasher):
+    pwhash = hasher.hash("test")
+    checks = [gevent.spawn(hasher.check, pwhash, "test") for _ in range(2)]
+    gevent.sleep(0)
+
+    assert hasher.stats["queued"] == 1
+
+    with pytest.raises(PasswordHasherBusyError):
+        hasher.check(pwhash, "test")
+
+    gevent.joinall(checks)
+
+    assert all(check.value for check in checks)
+    assert hasher.stats["rejected"] == 1
+
+
+def test_needs_rehash(hasher):
+    pwhash = hasher.hash("test")
+
+    assert not hasher.needs_rehash(pwhash)
+    assert PasswordHasher(1, 1, method="pbkdf2:sha512:1000").needs_rehash(pwhash)
+    assert PasswordHasher(1, 1, salt_length=8).needs_rehash(pwhash)
+
+    # werkzeug stores the method with the default iterations
+    hasher = PasswordHasher(0, 0, method="pbkdf2:sha512")
+    assert not hasher.needs_rehash(hasher.hash("test"))
@@ -0,0 +1,66 @@
+import pytest
+from redis import exceptions
+
+from app.redis import CircuitBreaker, CircuitBreakerError
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+
+def failing_call():
+    raise exceptions.ConnectionError
+
+
+def erroneous_call():
+    raise exceptions.ResponseError
+
+
+def test_breaker_opens_after_failures(breaker):
+    for _ in range(2):
+        with pytest.raises(exceptions.ConnectionError):
+            breaker.call(failing_call)
+
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitBreakerError):
+        breaker.call(lambda: "ok")
+
+    assert breaker.rejected == 1
+
+
+def test_breaker_closes_after_successful_trial(breaker):
+    for _ in range(2):
+        with pytest.raises(exceptions.ConnectionError):
+            breaker.call(failing_call)
+
+    breaker.reset_timeout = 0
+
+    assert breaker.state == "half-open"
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_breaker_ignores_other_errors(breaker):
+    for _ in range(3):
+        with pytest.raises(exceptions.ResponseError):
+            breaker.call(erroneous_call)
+
+    assert breaker.state == "closed"
+
+
+def test_breaker_retries_trial_after_other_errors(breaker):
+    for _ in range(2):
+        with pytest.raises(exceptions.ConnectionError):
+            breaker.call(failing_call)
+
+    breaker.reset_timeout = 0.1
+    breaker.opened_at -= 0.1
+
+    with pytest.raises(exceptions.ResponseError):
+        breaker.call(erroneous_call)
+
+    assert breaker.state == "half-open"
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
@@ -0,0 +1,43 @@
+import pytest
+
+from app.serializers import CompressedSerializer, SerializerError, get_serializer
+
+PAYLOAD = {
+    "id": "4c5a9f2e-8f62-4e43-9c63-6d3f0c9d2b71",
+    "login": "test",
+    "email": None,
+    "roles": ["guest", "staff"],
+    "active": True,
+}
+
+
+@pytest.mark.parametrize("name", ["json", "msgpack", "pickle"])
+@pytest.mark.parametrize("compress_threshold", [0, 1])
+def test_round_trip(name, compress_threshold):
+    serializer = get_serializer(name, compress_threshold)
+
+    assert serializer.loads(serializer.dumps(PAYLOAD)) == PAYLOAD
+
+
+def test_compression_above_threshold():
+    serializer = get_serializer("json", compress_threshold=100)
+    small, large = {"roles": ["guest"]}, {"roles": ["guest"] * 100}
+
+    assert serializer.dumps(small).startswith(CompressedSerializer.RAW)
+    assert serializer.dumps(large).startswith(CompressedSerializer.ZSTD)
+    assert len(serializer.dumps(large)) < len(get_serializer("json").dumps(large))
+    assert serializer.loads(serializer.dumps(large)) == large
+
+
+def test_unknown_serializer():
+    with pytest.raises(SerializerError):
+        get_serializer("yaml")
+
+
+@pytest.mark.parametrize("name", ["json", "msgpack", "pickle"])
+@pytest.mark.parametrize("compress_threshold", [0, 1])
+def test_unreadable_data(name, compress_threshold):
+    serializer = get_serializer(name, compress_threshold)
+
+    with pytest.raises(SerializerError):
+        serializer.loads(b"z\x93\x01")